@@ -7,12 +7,17 @@ from typing import TypedDict, Annotated, Literal
 from langgraph.graph import StateGraph, END
 from langchain_groq import ChatGroq
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain_community.tools import DuckDuckGoSearchRun
+import asyncio
+import groq
+import httpx
 import operator
 import json
 import os
+import re
 import sys
 from dotenv import load_dotenv
+from search import cached_search
+from semantic_cache import CachedChatGroq, embed_texts, load_embedder
 
 # Load environment variables from .env file
 load_dotenv()
@@ -22,6 +27,10 @@ if sys.platform == 'win32':
     import io
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
+elif hasattr(sys.stdout, 'reconfigure'):
+    # Same guarantee elsewhere (e.g. ASCII-only terminals): unencodable characters become '?'
+    sys.stdout.reconfigure(errors='replace')
+    sys.stderr.reconfigure(errors='replace')
 
 # ===========================
 # DEFINE STATE
@@ -31,12 +40,14 @@ class PitchState(TypedDict):
     """State that flows through the workflow"""
     mvp_description: str
     context: str
+    context_compact: str
     pitch: str
     critique: dict
     critique_count: int
     human_feedback: str
     human_approved: bool
     final_pitch: str
+    score_history: list
     messages: Annotated[list, operator.add]
 
 
@@ -47,67 +58,165 @@ class PitchState(TypedDict):
 def web_search(query: str) -> str:
     """Search the web for information about competitors, market trends, or industry insights"""
     try:
-        search = DuckDuckGoSearchRun()
-        results = search.run(query)
-        return results
+        return cached_search(query)
     except Exception as e:
         return f"Search failed: {str(e)}"
 
 
+# Built once at import rather than on every call
+_PITCH_TEMPLATES = {
+    "elevator": """
+    ELEVATOR PITCH TEMPLATE:
+    1. Hook (1 sentence): Grab attention with the problem
+    2. Solution (1-2 sentences): What you built
+    3. Unique Value (1 sentence): Why you're different
+    4. Traction (1 sentence): Evidence it works
+    5. Ask (1 sentence): What you need
+    """,
+    "investor": """
+    INVESTOR PITCH TEMPLATE:
+    1. Problem: What pain point exists?
+    2. Solution: Your product/MVP
+    3. Market Size: TAM/SAM/SOM
+    4. Business Model: How you make money
+    5. Traction: Metrics, users, revenue
+    6. Competition: Landscape and differentiation
+    7. Team: Why you'll win
+    8. Ask: Funding amount and use
+    """,
+    "demo_day": """
+    DEMO DAY PITCH TEMPLATE:
+    1. Opening Hook: Surprising stat or story
+    2. Problem: Relatable pain point
+    3. Solution Demo: Show the product
+    4. Market Opportunity: Size and timing
+    5. Traction: Key metrics
+    6. Vision: Where you're headed
+    7. Team: Quick credibility
+    8. The Ask: Clear and specific
+    """
+}
+
+
 def pitch_template_tool(pitch_type: str = "elevator") -> str:
     """Get a proven pitch template structure"""
-    templates = {
-        "elevator": """
-        ELEVATOR PITCH TEMPLATE:
-        1. Hook (1 sentence): Grab attention with the problem
-        2. Solution (1-2 sentences): What you built
-        3. Unique Value (1 sentence): Why you're different
-        4. Traction (1 sentence): Evidence it works
-        5. Ask (1 sentence): What you need
-        """,
-        "investor": """
-        INVESTOR PITCH TEMPLATE:
-        1. Problem: What pain point exists?
-        2. Solution: Your product/MVP
-        3. Market Size: TAM/SAM/SOM
-        4. Business Model: How you make money
-        5. Traction: Metrics, users, revenue
-        6. Competition: Landscape and differentiation
-        7. Team: Why you'll win
-        8. Ask: Funding amount and use
-        """,
-        "demo_day": """
-        DEMO DAY PITCH TEMPLATE:
-        1. Opening Hook: Surprising stat or story
-        2. Problem: Relatable pain point
-        3. Solution Demo: Show the product
-        4. Market Opportunity: Size and timing
-        5. Traction: Key metrics
-        6. Vision: Where you're headed
-        7. Team: Quick credibility
-        8. The Ask: Clear and specific
-        """
-    }
-    return templates.get(pitch_type, templates["elevator"])
+    return _PITCH_TEMPLATES.get(pitch_type, _PITCH_TEMPLATES["elevator"])
+
+
+# Single-pass analyzer: word starts, sentence periods and section keywords in one scan
+# Keywords match as substrings (like the original `in` checks); IGNORECASE avoids lowering a copy.
+# Each keyword category is its own named group, so case variants IGNORECASE accepts (e.g. 'ſolution')
+# never need mapping back to a dict key.
+_ANALYZER_RE = re.compile(
+    r'(?P<word>(?<!\S)(?=\S))|(?P<period>\.)'
+    r'|(?P<problem>problem|challenge|issue|pain)'
+    r'|(?P<solution>solution|solve|built|created)'
+    r'|(?P<market>market|billion)'
+    r'|(?P<market_traction>customers|users)'
+    r'|(?P<traction>revenue|growth)',
+    re.IGNORECASE
+)
+
+_KEYWORD_FLAGS = {
+    'problem': ('has_problem_statement',),
+    'solution': ('has_solution',),
+    'market': ('has_market',),
+    'market_traction': ('has_market', 'has_traction'),
+    'traction': ('has_traction',),
+}
 
 
 def pitch_analyzer(pitch_text: str) -> dict:
     """Analyze pitch structure and provide metrics"""
-    words = pitch_text.split()
-    sentences = pitch_text.split('.')
+    word_count = 0
+    period_count = 0
+    flags = set()
+    
+    for match in _ANALYZER_RE.finditer(pitch_text):
+        group = match.lastgroup
+        if group == 'word':
+            word_count += 1
+        elif group == 'period':
+            period_count += 1
+        else:
+            flags.update(_KEYWORD_FLAGS[group])
+    
+    # Matches the old split('.') semantics: N periods give N + 1 segments
+    sentence_count = period_count + 1
     
     analysis = {
-        "word_count": len(words),
-        "sentence_count": len(sentences),
-        "avg_words_per_sentence": len(words) / max(len(sentences), 1),
-        "has_problem_statement": any(word in pitch_text.lower() for word in ['problem', 'challenge', 'issue', 'pain']),
-        "has_solution": any(word in pitch_text.lower() for word in ['solution', 'solve', 'built', 'created']),
-        "has_market": any(word in pitch_text.lower() for word in ['market', 'customers', 'users', 'billion']),
-        "has_traction": any(word in pitch_text.lower() for word in ['users', 'revenue', 'growth', 'customers']),
+        "word_count": word_count,
+        "sentence_count": sentence_count,
+        "avg_words_per_sentence": word_count / max(sentence_count, 1),
+        "has_problem_statement": 'has_problem_statement' in flags,
+        "has_solution": 'has_solution' in flags,
+        "has_market": 'has_market' in flags,
+        "has_traction": 'has_traction' in flags,
     }
     return analysis
 
 
+# Structural bounds a pitch must meet before it's worth an LLM critique
+PRECHECK_MIN_WORDS = 80
+PRECHECK_MAX_WORDS = 400
+PRECHECK_MIN_SECTIONS = 2
+
+_PRECHECK_WEAKNESSES = {
+    "has_problem_statement": "No clear problem statement",
+    "has_solution": "The solution is not explained",
+    "has_market": "No market or target customer context",
+    "has_traction": "No traction or evidence that it works",
+}
+
+
+def precheck_pitch(pitch_text: str):
+    """Return a canned FAIL critique for structurally broken pitches, or None if the LLM critic should run"""
+    metrics = pitch_analyzer(pitch_text)
+    missing = [flag for flag in _PRECHECK_WEAKNESSES if not metrics[flag]]
+    too_short = metrics["word_count"] < PRECHECK_MIN_WORDS
+    too_long = metrics["word_count"] > PRECHECK_MAX_WORDS
+    
+    if not (too_short or too_long or len(_PRECHECK_WEAKNESSES) - len(missing) < PRECHECK_MIN_SECTIONS):
+        return None
+    
+    weaknesses = [_PRECHECK_WEAKNESSES[flag] for flag in missing]
+    if too_short:
+        weaknesses.append(f"Too short ({metrics['word_count']} words, aim for 150-250)")
+    if too_long:
+        weaknesses.append(f"Too long ({metrics['word_count']} words, aim for 150-250)")
+    
+    return {
+        "scores": {},
+        "overall_score": 5.0,
+        "decision": "FAIL",
+        "feedback": "The pitch is missing basic structure: " + "; ".join(weaknesses),
+        "strengths": [],
+        "weaknesses": weaknesses,
+        "precheck": True
+    }
+
+
+# Context sentences kept for the generator prompt
+CONTEXT_TOP_K_SENTENCES = 12
+
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+
+def compact_context(context: str, mvp_description: str, top_k: int = CONTEXT_TOP_K_SENTENCES) -> str:
+    """Keep the top_k context sentences most similar to the MVP, in their original order"""
+    sentences = [sentence for sentence in _SENTENCE_SPLIT_RE.split(context) if sentence.strip()]
+    
+    # Nothing to trim, or no local embedding model installed
+    if len(sentences) <= top_k or load_embedder() is None:
+        return context
+    
+    # One batched forward pass for all sentences plus the MVP description
+    vectors = embed_texts(sentences + [mvp_description])
+    similarities = vectors[:-1] @ vectors[-1]
+    keep = sorted(similarities.argsort()[-top_k:])
+    return " ".join(sentences[i] for i in keep)
+
+
 # ===========================
 # INITIALIZE LLMs
 # ===========================
@@ -118,55 +227,56 @@ groq_api_key = os.getenv("GROQ_API_KEY")
 if not groq_api_key:
     raise ValueError("GROQ_API_KEY not found in environment variables. Please add it to your .env file")
 
+# One pooled HTTP/2 connection to the Groq API shared by every role, so the
+# TCP+TLS handshake is paid once per run instead of once per client
+_groq_limits = httpx.Limits(max_keepalive_connections=8, keepalive_expiry=60)
+groq_client = groq.Groq(
+    api_key=groq_api_key,
+    http_client=httpx.Client(http2=True, limits=_groq_limits)
+).chat.completions
+groq_async_client = groq.AsyncGroq(
+    api_key=groq_api_key,
+    http_client=httpx.AsyncClient(http2=True, limits=_groq_limits)
+).chat.completions
+
 # Using Groq with openai/gpt-oss-120b model for all agents
-# Different temperatures for different purposes
-llm_context = ChatGroq(
+# One base client; each role is a cheap .bind() variant with its own temperature
+# Each role sits behind a semantic cache so repeat/paraphrased MVPs skip the network
+base_llm = ChatGroq(
     model="openai/gpt-oss-120b",
-    temperature=0.7,
-    groq_api_key=groq_api_key
+    groq_api_key=groq_api_key,
+    client=groq_client,
+    async_client=groq_async_client
 )
 
-llm_generator = ChatGroq(
-    model="openai/gpt-oss-120b",
-    temperature=0.8,
-    groq_api_key=groq_api_key
-)
+llm_context = CachedChatGroq(base_llm.bind(temperature=0.7), role="context")
 
-llm_critic = ChatGroq(
-    model="openai/gpt-oss-120b",
-    temperature=0.3,
-    groq_api_key=groq_api_key
-)
+# Only used through ainvoke_n: a cache entry holds a whole set of candidates
+llm_generator = CachedChatGroq(base_llm.bind(temperature=0.8), role="generator")
 
-llm_refiner = ChatGroq(
-    model="openai/gpt-oss-120b",
-    temperature=0.7,
-    groq_api_key=groq_api_key
+# Low temperature critic in JSON mode: only reuse scores for the exact same pitch
+llm_critic = CachedChatGroq(
+    base_llm.bind(temperature=0.3, response_format={"type": "json_object"}),
+    role="critic",
+    exact_only=True
 )
 
-llm_readiness = ChatGroq(
-    model="openai/gpt-oss-120b",
-    temperature=0.5,
-    groq_api_key=groq_api_key
-)
+# Refiner always calls the model - each iteration should produce something new
+llm_refiner = CachedChatGroq(base_llm.bind(temperature=0.7), role="refiner", bypass_cache=True)
+
+llm_readiness = CachedChatGroq(base_llm.bind(temperature=0.5), role="readiness")
+
+# Number of pitches drafted in parallel before the best one enters the refine loop
+NUM_PITCH_CANDIDATES = 3
 
 
 # ===========================
-# AGENT NODES
+# SYSTEM PROMPTS
 # ===========================
 
-def pitch_context_agent(state: PitchState) -> PitchState:
-    """Research and gather context about the MVP and market"""
-    
-    # Use web search to gather market context
-    print("[INFO] Gathering market context...")
-    search_query = f"{state['mvp_description'][:100]} market analysis competitors"
-    search_results = web_search(search_query)
-    
-    # Get pitch template
-    template = pitch_template_tool("elevator")
-    
-    system_prompt = """You are a startup research expert. Analyze the MVP description and search results to provide comprehensive context for creating a compelling pitch.
+# Static instructions are built once at import; nodes only template the HumanMessage
+
+_SYS_CONTEXT = SystemMessage(content="""You are a startup research expert. Analyze the MVP description and search results to provide comprehensive context for creating a compelling pitch.
 
     Provide context including:
     - Key market insights from the search results
@@ -174,34 +284,18 @@ def pitch_context_agent(state: PitchState) -> PitchState:
     - Target audience identification
     - Recommended pitch approach
     - Key value propositions to emphasize
-    """
-    
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=f"""MVP Description: {state['mvp_description']}
+    """)
 
-Market Research Results:
-{search_results}
-
-Pitch Template to Follow:
-{template}
-
-Based on this information, provide comprehensive context for creating a compelling pitch.""")
-    ]
+_SYS_CANDIDATE_CRITIC = SystemMessage(content="""You are a tough but fair pitch critic (think YC partner or top VC).
     
-    response = llm_context.invoke(messages)
-    context = response.content
+    You will receive several numbered candidate pitches for the same startup.
+    Score each one from 0 to 10 on clarity, problem, solution, uniqueness, traction and engagement combined.
     
-    return {
-        **state,
-        "context": context,
-        "messages": [AIMessage(content=f"Context gathered successfully")]
-    }
-
+    Return in JSON format, one score per candidate in the order given:
+    {"scores": [X, X, ...]}
+    """)
 
-def pitch_generator_agent(state: PitchState) -> PitchState:
-    """Generate the initial pitch based on context"""
-    system_prompt = """You are an expert pitch writer. Create a compelling, concise pitch that:
+_SYS_GENERATOR = SystemMessage(content="""You are an expert pitch writer. Create a compelling, concise pitch that:
     - Clearly articulates the problem and solution
     - Highlights unique value proposition
     - Includes specific, measurable outcomes
@@ -210,31 +304,9 @@ def pitch_generator_agent(state: PitchState) -> PitchState:
     
     Keep it concise (150-250 words for elevator pitch).
     Be specific, avoid jargon, and focus on impact.
-    """
-    
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=f"""
-        MVP Description: {state['mvp_description']}
-        
-        Research Context: {state['context']}
-        
-        Generate a compelling pitch.
-        """)
-    ]
-    
-    response = llm_generator.invoke(messages)
-    
-    return {
-        **state,
-        "pitch": response.content,
-        "messages": [AIMessage(content=f"Generated pitch")]
-    }
-
+    """)
 
-def pitch_critic_agent(state: PitchState) -> PitchState:
-    """Critically evaluate the pitch"""
-    system_prompt = """You are a tough but fair pitch critic (think YC partner or top VC).
+_SYS_CRITIC = SystemMessage(content="""You are a tough but fair pitch critic (think YC partner or top VC).
     
     Evaluate the pitch on:
     1. CLARITY (10/10): Is it immediately clear what they do?
@@ -259,52 +331,172 @@ def pitch_critic_agent(state: PitchState) -> PitchState:
         "strengths": ["strength 1", ...],
         "weaknesses": ["weakness 1", ...]
     }
-    """
+    """)
+
+_SYS_REFINER = SystemMessage(content="""You are a pitch refinement expert. 
     
+    Take the original pitch and the critique, then create an improved version that:
+    - Addresses all weaknesses mentioned
+    - Maintains the strengths
+    - Incorporates the feedback precisely
+    - Stays concise and impactful
+    
+    Make substantial improvements, don't just tweak words.
+    """)
+
+_SYS_READINESS = SystemMessage(content="""You are a pitch coach preparing the final deliverable.
+    
+    Create a polished final pitch package including:
+    1. The final pitch (clean, ready to use)
+    2. Delivery tips (tone, pacing, emphasis)
+    3. Anticipated questions and suggested answers
+    4. Key talking points to remember
+    5. One-liner version (for quick intros)
+    
+    Format professionally and make it presentation-ready.
+    """)
+
+
+# ===========================
+# AGENT NODES
+# ===========================
+
+async def pitch_context_agent(state: PitchState) -> dict:
+    """Research and gather context about the MVP and market"""
+    
+    # Use web search to gather market context (off the event loop); the template is a constant lookup
+    print("[INFO] Gathering market context...")
+    search_query = f"{state['mvp_description'][:100]} market analysis competitors"
+    search_results = await asyncio.to_thread(web_search, search_query)
+    template = pitch_template_tool("elevator")
+    
+    messages = [
+        _SYS_CONTEXT,
+        HumanMessage(content=f"""MVP Description: {state['mvp_description']}
+
+Market Research Results:
+{search_results}
+
+Pitch Template to Follow:
+{template}
+
+Based on this information, provide comprehensive context for creating a compelling pitch.""")
+    ]
+    
+    response = await llm_context.ainvoke(messages)
+    context = response.content
+    context_compact = await asyncio.to_thread(compact_context, context, state['mvp_description'])
+    
+    return {
+        "context": context,
+        "context_compact": context_compact,
+        "messages": [AIMessage(content=f"Context gathered successfully")]
+    }
+
+
+async def generate_k_candidates(messages: list, n: int = NUM_PITCH_CANDIDATES) -> list:
+    """Draft n pitch candidates concurrently from the same prompt"""
+    return await llm_generator.ainvoke_n(messages, n)
+
+
+async def pick_best_candidate(candidates: list) -> str:
+    """Score all candidates in a single critic call and return the highest scoring one"""
+    if len(candidates) == 1:
+        return candidates[0]
+    
+    numbered = "\n\n".join(f"CANDIDATE {i + 1}:\n{pitch}" for i, pitch in enumerate(candidates))
     messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=f"Critique this pitch:\n\n{state['pitch']}")
+        _SYS_CANDIDATE_CRITIC,
+        HumanMessage(content=f"Score these pitches:\n\n{numbered}")
     ]
     
-    response = llm_critic.invoke(messages)
+    response = await llm_critic.ainvoke(messages)
     
-    # Parse JSON response
     try:
-        critique = json.loads(response.content)
-    except:
-        # Fallback if not proper JSON
-        critique = {
-            "overall_score": 5.0,
-            "decision": "FAIL",
-            "feedback": response.content
-        }
+        scores = [float(score) for score in json.loads(response.content)["scores"]]
+        best = max(range(min(len(scores), len(candidates))), key=lambda i: scores[i])
+    except (ValueError, KeyError, TypeError):
+        # Fall back to the first draft if the scores can't be read, and don't serve them again
+        await asyncio.to_thread(llm_critic.invalidate, messages)
+        best = 0
+    
+    print(f"[INFO] Picked candidate {best + 1}/{len(candidates)}")
+    return candidates[best]
+
+
+async def pitch_generator_agent(state: PitchState) -> dict:
+    """Generate the initial pitch based on context"""
+    messages = [
+        _SYS_GENERATOR,
+        HumanMessage(content=f"""
+        MVP Description: {state['mvp_description']}
+        
+        Research Context: {state['context_compact']}
+        
+        Generate a compelling pitch.
+        """)
+    ]
+    
+    candidates = await generate_k_candidates(messages)
+    pitch = await pick_best_candidate(candidates)
+    
+    return {
+        "pitch": pitch,
+        "messages": [AIMessage(content=f"Generated pitch ({len(candidates)} candidates)")]
+    }
+
+
+async def pitch_critic_agent(state: PitchState) -> dict:
+    """Critically evaluate the pitch"""
+    # Obviously weak pitches fail without spending an LLM call
+    critique = precheck_pitch(state['pitch'])
+    
+    if critique is not None:
+        print("[INFO] Pitch failed structural pre-check - skipping LLM critic")
+    else:
+        messages = [
+            _SYS_CRITIC,
+            HumanMessage(content=f"Critique this pitch:\n\n{state['pitch']}")
+        ]
+        
+        response = await llm_critic.ainvoke(messages)
+        
+        # Parse JSON response
+        try:
+            critique = json.loads(response.content)
+        except:
+            # Fallback if not proper JSON - and drop it from the cache so the next run asks again
+            await asyncio.to_thread(llm_critic.invalidate, messages)
+            critique = {
+                "overall_score": 5.0,
+                "decision": "FAIL",
+                "feedback": response.content
+            }
+    
+    # The precheck's canned score isn't a real measurement - keep it out of the plateau history
+    score_history = state.get("score_history", [])
+    if not critique.get("precheck"):
+        try:
+            score = float(critique.get("overall_score", 0))
+        except (TypeError, ValueError):
+            score = 0.0
+        score_history = score_history + [score]
     
     return {
-        **state,
         "critique": critique,
         "critique_count": state.get("critique_count", 0) + 1,
+        "score_history": score_history,
         "messages": [AIMessage(content=f"Critique complete: {critique['decision']}")]
     }
 
 
-def pitch_refiner_agent(state: PitchState) -> PitchState:
+async def pitch_refiner_agent(state: PitchState) -> dict:
     """Refine the pitch based on critique"""
-    system_prompt = """You are a pitch refinement expert. 
-    
-    Take the original pitch and the critique, then create an improved version that:
-    - Addresses all weaknesses mentioned
-    - Maintains the strengths
-    - Incorporates the feedback precisely
-    - Stays concise and impactful
-    
-    Make substantial improvements, don't just tweak words.
-    """
-    
     feedback = state['critique'].get('feedback', 'No specific feedback')
     weaknesses = state['critique'].get('weaknesses', [])
     
     messages = [
-        SystemMessage(content=system_prompt),
+        _SYS_REFINER,
         HumanMessage(content=f"""
         Original Pitch:
         {state['pitch']}
@@ -319,33 +511,30 @@ def pitch_refiner_agent(state: PitchState) -> PitchState:
         """)
     ]
     
-    response = llm_refiner.invoke(messages)
+    response = await llm_refiner.ainvoke(messages)
     
     return {
-        **state,
         "pitch": response.content,
         "messages": [AIMessage(content=f"Pitch refined (iteration {state['critique_count']})")]
     }
 
 
-def safe_print(text):
-    """Safely print text with encoding fallback"""
-    try:
-        print(text)
-    except UnicodeEncodeError:
-        # Replace problematic characters with ASCII equivalents
-        safe_text = text.encode('ascii', 'replace').decode('ascii')
-        print(safe_text)
+# stdout is configured with errors='replace' at import, so print can't raise UnicodeEncodeError
+safe_print = print
 
 
-def human_review_node(state: PitchState) -> PitchState:
+def human_review_node(state: PitchState) -> dict:
     """Simulate human review (in production, this would wait for actual human input)"""
-    safe_print("\n" + "="*60)
-    safe_print("HUMAN REVIEW REQUIRED")
-    safe_print("="*60)
-    safe_print(f"\nCurrent Pitch:\n{state['pitch']}\n")
-    safe_print(f"Critique Score: {state['critique'].get('overall_score', 'N/A')}/10")
-    safe_print(f"Feedback: {state['critique'].get('feedback', 'N/A')}\n")
+    # Emit the whole banner in one write
+    sys.stdout.write("\n".join([
+        "\n" + "="*60,
+        "HUMAN REVIEW REQUIRED",
+        "="*60,
+        f"\nCurrent Pitch:\n{state['pitch']}\n",
+        f"Critique Score: {state['critique'].get('overall_score', 'N/A')}/10",
+        f"Feedback: {state['critique'].get('feedback', 'N/A')}\n"
+    ]) + "\n")
+    sys.stdout.flush()
     
     # In production, you'd wait for actual input
     # For demo, we'll auto-approve if score > 8
@@ -362,29 +551,16 @@ def human_review_node(state: PitchState) -> PitchState:
         feedback = input("What should be improved? ")
     
     return {
-        **state,
         "human_approved": approved,
         "human_feedback": feedback,
         "messages": [AIMessage(content=f"Human review: {'Approved' if approved else 'Rejected'}")]
     }
 
 
-def pitch_readiness_agent(state: PitchState) -> PitchState:
+async def pitch_readiness_agent(state: PitchState) -> dict:
     """Prepare final pitch with delivery notes"""
-    system_prompt = """You are a pitch coach preparing the final deliverable.
-    
-    Create a polished final pitch package including:
-    1. The final pitch (clean, ready to use)
-    2. Delivery tips (tone, pacing, emphasis)
-    3. Anticipated questions and suggested answers
-    4. Key talking points to remember
-    5. One-liner version (for quick intros)
-    
-    Format professionally and make it presentation-ready.
-    """
-    
     messages = [
-        SystemMessage(content=system_prompt),
+        _SYS_READINESS,
         HumanMessage(content=f"""
         Approved Pitch:
         {state['pitch']}
@@ -396,10 +572,9 @@ def pitch_readiness_agent(state: PitchState) -> PitchState:
         """)
     ]
     
-    response = llm_readiness.invoke(messages)
+    response = await llm_readiness.ainvoke(messages)
     
     return {
-        **state,
         "final_pitch": response.content,
         "messages": [AIMessage(content="Final pitch package ready!")]
     }
@@ -409,6 +584,9 @@ def pitch_readiness_agent(state: PitchState) -> PitchState:
 # ROUTING FUNCTIONS
 # ===========================
 
+# Refinement must lift the critic score by at least this much to keep iterating
+MIN_SCORE_IMPROVEMENT = 0.3
+
 def route_after_critic(state: PitchState) -> Literal["human_review", "refiner"]:
     """Route based on critic's decision"""
     decision = state['critique'].get('decision', 'FAIL')
@@ -420,6 +598,12 @@ def route_after_critic(state: PitchState) -> Literal["human_review", "refiner"]:
     
     if decision == "PASS":
         return "human_review"
+    
+    # Stop refining once the score stops improving meaningfully (a structurally broken pitch always gets refined)
+    history = state.get('score_history', [])
+    if not state['critique'].get('precheck') and len(history) >= 2 and history[-1] - history[-2] < MIN_SCORE_IMPROVEMENT and history[-1] < 7.5:
+        print(f"\n[INFO] Score plateaued ({history[-2]} -> {history[-1]}). Moving to human review...")
+        return "human_review"
     else:
         print(f"\n[INFO] Refinement iteration {state['critique_count']}/5 - Sending to refiner...")
         return "refiner"
@@ -495,12 +679,14 @@ def run_pitch_workflow(mvp_description: str):
     initial_state = {
         "mvp_description": mvp_description,
         "context": "",
+        "context_compact": "",
         "pitch": "",
         "critique": {},
         "critique_count": 0,
         "human_feedback": "",
         "human_approved": False,
         "final_pitch": "",
+        "score_history": [],
         "messages": []
     }
     
@@ -509,8 +695,8 @@ def run_pitch_workflow(mvp_description: str):
     
     safe_print("\n[START] Starting Pitch Generation Workflow...\n")
     
-    # Run the workflow
-    final_state = app.invoke(initial_state)
+    # Run the workflow (async nodes fan out LLM calls concurrently)
+    final_state = asyncio.run(app.ainvoke(initial_state))
     
     # Display results
     safe_print("\n" + "="*60)
@@ -0,0 +1,78 @@
+"""
+Exact-Match LLM Response Cache
+Content-addressed cache of raw completions for the low-temperature JSON roles
+"""
+
+from typing import Awaitable, Callable, Optional
+from diskcache import Cache
+import asyncio
+import hashlib
+import json
+
+# Only roles at or below this temperature are deterministic enough to cache
+MAX_CACHEABLE_TEMPERATURE = 0.5
+
+# Nearly every server-side critique is a unique prompt, so entries are bounded by age and total size
+LLM_CACHE_TTL = 7 * 24 * 60 * 60
+LLM_CACHE_SIZE_LIMIT = 200 * 1024 * 1024
+
+
+class DiskBackend:
+    """Cached responses in a size-limited diskcache store; entries expire after ttl seconds"""
+
+    def __init__(self, directory: str = ".llm_cache/", ttl: int = LLM_CACHE_TTL,
+                 size_limit: int = LLM_CACHE_SIZE_LIMIT):
+        self.cache = Cache(directory, size_limit=size_limit)
+        self.ttl = ttl
+
+    def get(self, key: str) -> Optional[str]:
+        return self.cache.get(key)
+
+    def set(self, key: str, value: str):
+        self.cache.set(key, value, expire=self.ttl)
+
+    def delete(self, key: str):
+        self.cache.delete(key)
+
+
+class LLMCache:
+    """Maps (model, temperature, messages) to the raw response string"""
+
+    def __init__(self, backend=None):
+        self.backend = backend or DiskBackend()
+
+    @staticmethod
+    def _settings(llm) -> tuple:
+        """Model name and effective temperature, also for llm.bind(temperature=...) variants"""
+        model = getattr(llm, "bound", llm)
+        temperature = getattr(llm, "kwargs", {}).get("temperature", model.temperature)
+        return model.model_name, temperature
+
+    @staticmethod
+    def make_key(llm, messages: list) -> Optional[str]:
+        """Hash the request; returns None for roles too random to cache"""
+        model_name, temperature = LLMCache._settings(llm)
+        if temperature > MAX_CACHEABLE_TEMPERATURE:
+            return None
+        payload = json.dumps({
+            "model": model_name,
+            "temp": temperature,
+            "msgs": [(message.type, message.content) for message in messages]
+        })
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def aget_or_compute(self, key: Optional[str], compute: Callable[[], Awaitable[str]]) -> str:
+        """Return the cached response for key, awaiting compute() on a miss; disk I/O runs in a worker thread"""
+        if key is None:
+            return await compute()
+        cached = await asyncio.to_thread(self.backend.get, key)
+        if cached is not None:
+            return cached
+        value = await compute()
+        await asyncio.to_thread(self.backend.set, key, value)
+        return value
+
+    def invalidate(self, key: Optional[str]):
+        """Drop an entry, e.g. when the cached response turned out to be unusable"""
+        if key is not None:
+            self.backend.delete(key)
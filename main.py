@@ -3,12 +3,24 @@ FastAPI Deployment for Pitch Generation Agent
 Step-by-step execution with manual approval at each stage
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Query, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, Extra, Field
+from typing import Optional, Dict, Any, List
 from enum import Enum
+from cachetools import TTLCache
+import asyncio
+import difflib
+import groq
+import hashlib
+import logging
+import logging.handlers
+import queue
+import time
+import httpx
 import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime
 
 # LangGraph and LLM imports
@@ -16,22 +28,58 @@ from typing import TypedDict, Annotated, Literal
 from langgraph.graph import StateGraph, END
 from langchain_groq import ChatGroq
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain_community.tools import DuckDuckGoSearchRun
 import operator
-import json
+import msgspec
+import orjson
 import os
+import re
 from dotenv import load_dotenv
+from search import cached_search, normalize_query
+from llm_cache import LLMCache, DiskBackend
+from session_store import SESSION_SWEEP_INTERVAL_SECONDS, SESSION_TTL_SECONDS, WORKFLOW_LOCK_TTL_SECONDS, create_session_store
 
 load_dotenv()
 
+# ===========================
+# LOGGING
+# ===========================
+
+# Handlers only enqueue records; a listener thread (started in lifespan) does the actual stdout writes,
+# so logging never blocks the event loop
+log_queue: queue.Queue = queue.Queue(-1)
+
+logger = logging.getLogger("pitch_api")
+logger.setLevel(logging.INFO)
+logger.addHandler(logging.handlers.QueueHandler(log_queue))
+logger.propagate = False
+
+_log_stream_handler = logging.StreamHandler()
+_log_stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+log_listener = logging.handlers.QueueListener(log_queue, _log_stream_handler)
+
 # ===========================
 # FASTAPI APP SETUP
 # ===========================
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Connect the session store (and its expiry sweeper) for the lifetime of the server"""
+    log_listener.start()
+    await session_store.start()
+    pruner = asyncio.create_task(_prune_process_local_state_loop())
+    yield
+    pruner.cancel()
+    await session_store.close()
+    # The pooled Groq HTTP client is module-level and lives as long as the process: closing it here
+    # would break every LLM call after a second startup (tests, reloads), and exit releases its sockets
+    log_listener.stop()
+
 app = FastAPI(
     title="Pitch Generation Agent API",
     description="AI-powered pitch generation with step-by-step approval",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -46,15 +94,62 @@ app.add_middleware(
 # PYDANTIC MODELS
 # ===========================
 
+# Upper bounds reject abusive payloads during parsing, before any LLM work
+MAX_MVP_DESCRIPTION_CHARS = 5000
+MAX_FEEDBACK_CHARS = 2000
+
+class RequestConfig:
+    """Shared config for request bodies: immutable, unknown keys dropped, strings stripped"""
+    extra = Extra.ignore
+    frozen = True
+    anystr_strip_whitespace = True
+
 class PitchInput(BaseModel):
-    mvp_description: str
+    mvp_description: str = Field(..., min_length=1, max_length=MAX_MVP_DESCRIPTION_CHARS)
+    
+    Config = RequestConfig
 
 class ApprovalDecision(BaseModel):
     approved: bool  # True = approve, False = reject and refine
-    feedback: Optional[str] = ""
+    feedback: Optional[str] = Field("", max_length=MAX_FEEDBACK_CHARS)
+    
+    Config = RequestConfig
+
+class InteractiveRequest(BaseModel):
+    """Either a new MVP description, or a decision on a session awaiting approval"""
+    mvp_description: Optional[str] = Field(None, max_length=MAX_MVP_DESCRIPTION_CHARS)
+    pending_session_id: Optional[str] = None
+    decision: Optional[ApprovalDecision] = None
+    
+    Config = RequestConfig
+
+# Critic output is decoded straight from the LLM's JSON into msgspec structs;
+# sessions and responses get plain dicts via msgspec.to_builtins
+class Critique(msgspec.Struct, kw_only=True):
+    """Typed shape of the critic's verdict. Only decision and overall_score drive the loop, so only they
+    are strict - a malformed sub-score (e.g. "8/10") shouldn't throw away an otherwise valid verdict"""
+    scores: Dict[str, Any] = {}
+    overall_score: float
+    decision: str
+    feedback: Any = ""
+    strengths: List[Any] = []
+    weaknesses: List[Any] = []
+
+    def __post_init__(self):
+        self.decision = self.decision.strip().upper()
+        if self.decision not in ("PASS", "FAIL"):
+            raise ValueError(f"decision must be PASS or FAIL, got {self.decision!r}")
+
+class CritiqueBatch(msgspec.Struct):
+    critiques: List[Critique]
+
+class RefinedPitches(msgspec.Struct):
+    """Batch refiner output"""
+    pitches: List[str]
 
 class SessionStatus(str, Enum):
     INITIALIZED = "initialized"
+    RUNNING = "running"
     CONTEXT_GATHERED = "context_gathered"
     PITCH_GENERATED = "pitch_generated"
     PITCH_CRITIQUED = "pitch_critiqued"
@@ -63,25 +158,59 @@ class SessionStatus(str, Enum):
     APPROVED = "approved"
     COMPLETED = "completed"
     MAX_ITERATIONS_REACHED = "max_iterations_reached"
+    FAILED = "failed"
 
 # ===========================
-# IN-MEMORY SESSION STORE
+# SESSION STORE
 # ===========================
 
-sessions: Dict[str, Dict[str, Any]] = {}
+# SESSION_BACKEND=memory (default, single worker) or redis (shared across workers, see REDIS_URL).
+# Sessions are plain dicts: mutate, then save() - the Redis backend only sees what is saved.
+session_store = create_session_store()
+
+# Events after which a workflow waits for the user, so the WebSocket stream ends
+TERMINAL_EVENTS = {"awaiting_approval", "failed"}
+
+# Strong references to running workflows so they aren't garbage collected mid-flight
+background_tasks: set = set()
+
+# Serialized final packages per (session_id, version). Process-local: a new version or another worker misses
+final_json_cache: TTLCache = TTLCache(maxsize=1024, ttl=SESSION_TTL_SECONDS)
+
+async def _prune_process_local_state_loop():
+    """Expire cached contexts and final packages"""
+    while True:
+        await asyncio.sleep(SESSION_SWEEP_INTERVAL_SECONDS)
+        context_cache.expire()
+        final_json_cache.expire()
+
+@asynccontextmanager
+async def workflow_lock(session_id: str):
+    """Run a session's workflow exclusively: 409 if a request or background task is already running it"""
+    token = await session_store.try_lock(session_id)
+    if token is None:
+        raise HTTPException(status_code=409, detail="Session is already being processed")
+    refresher = asyncio.create_task(_refresh_workflow_lock(session_id, token))
+    try:
+        yield
+    finally:
+        refresher.cancel()
+        await session_store.unlock(session_id, token)
+
+async def _refresh_workflow_lock(session_id: str, token: str):
+    """Keep extending the lock's TTL for as long as the workflow runs"""
+    while True:
+        await asyncio.sleep(WORKFLOW_LOCK_TTL_SECONDS / 3)
+        if not await session_store.refresh_lock(session_id, token):
+            logger.warning(f"[{session_id}] Workflow lock expired before it could be refreshed")
+            return
 
 # ===========================
 # TOOLS
 # ===========================
 
-def web_search(query: str) -> str:
-    """Search the web for information"""
-    try:
-        search = DuckDuckGoSearchRun()
-        results = search.run(query)
-        return results[:1000]  # Limit results
-    except Exception as e:
-        return f"Market research for similar products and competitors"
+# Stand-in search results when the search backend fails
+SEARCH_FALLBACK = "Market research for similar products and competitors"
 
 def pitch_template_tool() -> str:
     """Get pitch template"""
@@ -94,6 +223,37 @@ def pitch_template_tool() -> str:
     5. Ask: What you need
     """
 
+# Markdown code fence (optionally tagged json) wrapped around the whole response
+_FENCE_RE = re.compile(r'^\s*```(?:json)?\s*(.*?)\s*```\s*$', re.DOTALL)
+
+# Outermost {...} span of a response, for JSON with chatter around it
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+def extract_json(content: str) -> str:
+    """Strip a surrounding code fence from an LLM response"""
+    match = _FENCE_RE.match(content)
+    return match.group(1) if match else content.strip()
+
+def decode_llm_json(content: str, struct_type):
+    """Decode an LLM JSON response straight into a msgspec type (numeric strings are accepted)"""
+    content = extract_json(content)
+    try:
+        return msgspec.json.decode(content, type=struct_type, strict=False)
+    except msgspec.DecodeError:
+        # Chatter around the object - fall back to extracting the outermost {...}
+        return msgspec.convert(parse_json_object(content), struct_type, strict=False)
+
+def parse_json_object(content: str) -> dict:
+    """Parse the JSON object embedded in an LLM response"""
+    content = extract_json(content)
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        match = _JSON_OBJECT_RE.search(content)
+        if match is None:
+            raise
+        return orjson.loads(match.group(0))
+
 # ===========================
 # INITIALIZE LLMs
 # ===========================
@@ -102,57 +262,78 @@ groq_api_key = os.getenv("GROQ_API_KEY")
 if not groq_api_key:
     raise ValueError("GROQ_API_KEY not found in .env file")
 
-llm_context = ChatGroq(model="openai/gpt-oss-120b", temperature=0.7, groq_api_key=groq_api_key)
-llm_generator = ChatGroq(model="openai/gpt-oss-120b", temperature=0.8, groq_api_key=groq_api_key)
-llm_critic = ChatGroq(model="openai/gpt-oss-120b", temperature=0.3, groq_api_key=groq_api_key)
-llm_refiner = ChatGroq(model="openai/gpt-oss-120b", temperature=0.7, groq_api_key=groq_api_key)
-llm_readiness = ChatGroq(model="openai/gpt-oss-120b", temperature=0.5, groq_api_key=groq_api_key)
+# Shared pooled HTTP/2 connections to the Groq API for every role, created once per process.
+# All API calls are async; ChatGroq builds its own (unused) sync client when none is passed.
+groq_http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_keepalive_connections=100, max_connections=200, keepalive_expiry=60),
+    timeout=30
+)
+groq_async_client = groq.AsyncGroq(api_key=groq_api_key, http_client=groq_http_client).chat.completions
 
-# ===========================
-# CORE WORKFLOW FUNCTIONS
-# ===========================
+# One base client; each role is a .bind() variant that only overrides per-call kwargs
+base_llm = ChatGroq(model="openai/gpt-oss-120b", groq_api_key=groq_api_key, async_client=groq_async_client)
 
-def gather_context(mvp_description: str) -> str:
-    """Step 1: Gather context"""
-    search_query = f"{mvp_description[:100]} market analysis"
-    search_results = web_search(search_query)
-    template = pitch_template_tool()
-    
-    system_prompt = """You are a startup research expert. Analyze the MVP and provide context for creating a compelling pitch."""
-    
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=f"""MVP: {mvp_description}
+llm_context = base_llm.bind(temperature=0.7)
+llm_generator = base_llm.bind(temperature=0.8)
+llm_refiner = base_llm.bind(temperature=0.7)
 
-Search Results: {search_results}
+# Critic and readiness return JSON - Groq's JSON mode guarantees a parseable object
+JSON_MODE = {"response_format": {"type": "json_object"}}
+llm_critic = base_llm.bind(temperature=0.3, **JSON_MODE)
+llm_readiness = base_llm.bind(temperature=0.5, **JSON_MODE)
+llm_batch_refiner = base_llm.bind(temperature=0.8, **JSON_MODE)
 
-Template: {template}
+# Auto-refinement asks for this many alternative pitches in one call and critiques them all in one call
+REFINE_CANDIDATES = 3
 
-Provide comprehensive context including market insights, target audience, and key value propositions.""")
-    ]
-    
-    response = llm_context.invoke(messages)
-    return response.content
+# Refinements this similar to the pitch they came from won't change the critic's verdict
+STAGNATION_SIMILARITY = 0.95
 
-def generate_pitch(mvp_description: str, context: str) -> str:
-    """Step 2: Generate pitch"""
-    system_prompt = """Create a compelling, concise pitch (150-250 words) that:
+# Exact-match cache for the low-temperature JSON roles (critic, readiness)
+llm_cache = LLMCache(backend=DiskBackend(".llm_cache/"))
+
+# Refine in parallel with each critique and discard the draft on PASS.
+# Halves the latency of failed iterations at the cost of one wasted call per PASS. The draft can't see
+# the critique it runs alongside - it is guided by the previous iteration's critique (none for the first
+# pitch), so its fixes are less targeted; set SPECULATIVE_REFINE=false to only refine after a FAIL.
+SPECULATIVE_REFINE = os.getenv("SPECULATIVE_REFINE", "true").lower() in ("1", "true", "yes")
+
+# Cap simultaneous Groq calls across all sessions of this worker so bursts queue here instead of tripping
+# rate limits. Both limits are per process: the account-wide ceiling is WEB_CONCURRENCY times these values.
+LLM_SEM = asyncio.Semaphore(int(os.getenv("LLM_MAX_CONCURRENCY", "20")))
+
+# Optional requests-per-minute ceiling per worker (token bucket); LLM_RPM=0 disables it
+LLM_RPM = int(os.getenv("LLM_RPM", "0"))
+if LLM_RPM:
+    from aiolimiter import AsyncLimiter  # optional dependency, only needed when LLM_RPM is set
+    llm_rate_limiter = AsyncLimiter(LLM_RPM, 60)
+else:
+    llm_rate_limiter = None
+
+@asynccontextmanager
+async def llm_slot():
+    """Hold a concurrency slot (and a rate-limit token) for the duration of one LLM call"""
+    async with LLM_SEM:
+        if llm_rate_limiter is not None:
+            await llm_rate_limiter.acquire()
+        yield
+
+# ===========================
+# SYSTEM PROMPTS
+# ===========================
+
+# Static instructions are built once at import; helpers only template the HumanMessage
+
+_SYS_CONTEXT = SystemMessage(content="""You are a startup research expert. Analyze the MVP and provide context for creating a compelling pitch.""")
+
+_SYS_GENERATOR = SystemMessage(content="""Create a compelling, concise pitch (150-250 words) that:
     - Clearly articulates the problem and solution
     - Highlights unique value proposition
     - Includes specific outcomes
-    - Is engaging and memorable"""
-    
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=f"MVP: {mvp_description}\n\nContext: {context}\n\nGenerate a compelling pitch.")
-    ]
-    
-    response = llm_generator.invoke(messages)
-    return response.content
+    - Is engaging and memorable""")
 
-def critique_pitch(pitch: str) -> dict:
-    """Step 3: Critique pitch"""
-    system_prompt = """Evaluate the pitch on 6 criteria (each out of 10):
+_SYS_CRITIC = SystemMessage(content="""Evaluate the pitch on 6 criteria (each out of 10):
     1. CLARITY: Is it immediately clear what they do?
     2. PROBLEM: Is the problem compelling?
     3. SOLUTION: Is the solution clearly explained?
@@ -170,67 +351,39 @@ def critique_pitch(pitch: str) -> dict:
         "weaknesses": ["weakness 1", "weakness 2"]
     }
     
-    PASS if overall_score >= 7.5, otherwise FAIL."""
-    
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=f"Critique this pitch:\n\n{pitch}")
-    ]
-    
-    response = llm_critic.invoke(messages)
-    
-    try:
-        # Clean up response
-        content = response.content.strip()
-        if content.startswith("```"):
-            content = content.split("```")[1]
-            if content.startswith("json"):
-                content = content[4:]
-        content = content.strip()
-        
-        critique = json.loads(content)
-        return critique
-    except Exception as e:
-        print(f"Error parsing critique: {e}")
-        print(f"Response: {response.content}")
-        return {
-            "overall_score": 6.0,
-            "decision": "FAIL",
-            "feedback": f"Could not parse critique properly. Raw response: {response.content[:200]}",
-            "scores": {},
-            "strengths": [],
-            "weaknesses": ["Needs improvement"]
-        }
+    PASS if overall_score >= 7.5, otherwise FAIL.""")
 
-def refine_pitch(original_pitch: str, critique: dict, user_feedback: str = "") -> str:
-    """Step 4: Refine pitch based on critique"""
-    system_prompt = """You are a pitch refinement expert. Improve the pitch by addressing all weaknesses."""
-    
-    feedback = critique.get('feedback', '')
-    weaknesses = critique.get('weaknesses', [])
+_SYS_BATCH_CRITIC = SystemMessage(content="""You will receive several numbered pitches. Evaluate EACH pitch on 6 criteria (each out of 10):
+    1. CLARITY: Is it immediately clear what they do?
+    2. PROBLEM: Is the problem compelling?
+    3. SOLUTION: Is the solution clearly explained?
+    4. UNIQUENESS: What makes this different?
+    5. TRACTION: Any proof it works?
+    6. ENGAGEMENT: Is it memorable?
     
-    user_note = f"\n\nUser Feedback: {user_feedback}" if user_feedback else ""
+    Return ONLY valid JSON (no markdown, no backticks) with one critique per pitch, in the same order:
+    {
+        "critiques": [
+            {
+                "scores": {"clarity": X, "problem": X, "solution": X, "uniqueness": X, "traction": X, "engagement": X},
+                "overall_score": X.X,
+                "decision": "PASS or FAIL",
+                "feedback": "detailed feedback",
+                "strengths": ["strength 1", "strength 2"],
+                "weaknesses": ["weakness 1", "weakness 2"]
+            }
+        ]
+    }
     
-    messages = [
-        SystemMessage(content=system_prompt),
-        HumanMessage(content=f"""Original Pitch:
-{original_pitch}
+    PASS if overall_score >= 7.5, otherwise FAIL.""")
 
-Critique Feedback:
-{feedback}
+_SYS_REFINER = SystemMessage(content="""You are a pitch refinement expert. Improve the pitch by addressing all weaknesses.""")
 
-Weaknesses to address:
-{', '.join(weaknesses)}{user_note}
+_SYS_BATCH_REFINER = SystemMessage(content="""You are a pitch refinement expert. Improve the pitch by addressing all weaknesses.
+    Write several substantially different improved versions (vary the hook, structure and emphasis).
+    Return ONLY valid JSON (no markdown, no backticks): {"pitches": ["version 1", "version 2", ...]}""")
 
-Create a substantially improved version.""")
-    ]
-    
-    response = llm_refiner.invoke(messages)
-    return response.content
-
-def prepare_final_pitch(pitch: str, user_feedback: str = "") -> dict:
-    """Step 5: Prepare final pitch package in structured JSON format"""
-    system_prompt = """Create a comprehensive final pitch package. Return ONLY valid JSON (no markdown, no backticks) with this structure:
+_SYS_READINESS = SystemMessage(content="""Create a comprehensive final pitch package. Return ONLY valid JSON (no markdown, no backticks) with this structure:
 
 {
   "elevator_pitch": "One sentence pitch (30-40 words)",
@@ -276,28 +429,212 @@ def prepare_final_pitch(pitch: str, user_feedback: str = "") -> dict:
     "pacing": "timing guidance",
     "emphasis_points": ["what to emphasize"]
   }
-}"""
+}""")
+
+
+# ===========================
+# CORE WORKFLOW FUNCTIONS
+# ===========================
+
+# Resubmitted MVP descriptions reuse their research context for a day
+CONTEXT_CACHE_TTL_SECONDS = 24 * 60 * 60
+context_cache: TTLCache = TTLCache(maxsize=1024, ttl=CONTEXT_CACHE_TTL_SECONDS)
+
+def context_cache_key(mvp_description: str) -> str:
+    """Hash of the normalized description, so case and whitespace variants share an entry"""
+    return hashlib.sha256(normalize_query(mvp_description).encode("utf-8")).hexdigest()
+
+async def agather_context(mvp_description: str) -> str:
+    """Step 1: Gather context, served from the context cache when the MVP was seen recently"""
+    key = context_cache_key(mvp_description)
+    context = context_cache.get(key)
+    if context is None:
+        context, search_ok = await _agather_context_uncached(mvp_description)
+        # Context built on the search fallback is only used once, so the next request retries the search
+        if search_ok:
+            context_cache[key] = context
+    return context
+
+async def _agather_context_uncached(mvp_description: str) -> tuple:
+    """External sources fetched concurrently, then summarized by the context LLM.
+    Returns (context, search_ok); search_ok is False when the search failed and the fallback was used"""
+    search_query = f"{mvp_description[:100]} market analysis"
+    # The search client is synchronous, so it runs in a worker thread to keep the event loop free
+    try:
+        search_results = (await asyncio.to_thread(cached_search, search_query))[:1000]  # Limit results
+        search_ok = True
+    except Exception as e:
+        logger.warning(f"Market search failed, using fallback context: {e}")
+        search_results = SEARCH_FALLBACK
+        search_ok = False
+    template = pitch_template_tool()  # constant lookup, no I/O
+    
+    messages = [
+        _SYS_CONTEXT,
+        HumanMessage(content=f"""MVP: {mvp_description}
+
+Search Results: {search_results}
+
+Template: {template}
+
+Provide comprehensive context including market insights, target audience, and key value propositions.""")
+    ]
+    
+    async with llm_slot():
+        response = await llm_context.ainvoke(messages)
+    return response.content, search_ok
+
+async def generate_pitch(mvp_description: str, context: str) -> str:
+    """Step 2: Generate pitch"""
+    messages = [
+        _SYS_GENERATOR,
+        HumanMessage(content=f"MVP: {mvp_description}\n\nContext: {context}\n\nGenerate a compelling pitch.")
+    ]
+    
+    # Stream tokens so the pitch is ready the moment the stream closes
+    chunks = []
+    async with llm_slot():
+        async for chunk in llm_generator.astream(messages):
+            chunks.append(chunk.content)
+    return "".join(chunks)
+
+def critic_messages(pitch: str) -> list:
+    """Build the critic prompt; only the HumanMessage is templated per call"""
+    return [_SYS_CRITIC, HumanMessage(content=f"Critique this pitch:\n\n{pitch}")]
+
+async def acritique_pitch(pitch: str) -> Critique:
+    """Step 3: Critique pitch"""
+    messages = critic_messages(pitch)
+    
+    async def call_critic() -> str:
+        async with llm_slot():
+            return (await llm_critic.ainvoke(messages)).content
+    
+    cache_key = LLMCache.make_key(llm_critic, messages)
+    raw_content = await llm_cache.aget_or_compute(cache_key, call_critic)
+    
+    try:
+        return decode_llm_json(raw_content, Critique)
+    except Exception as e:
+        logger.error(f"Error parsing critique: {e}")
+        logger.error(f"Response: {raw_content}")
+        # Don't serve an unparseable response again on the next attempt
+        await asyncio.to_thread(llm_cache.invalidate, cache_key)
+        return Critique(
+            overall_score=6.0,
+            decision="FAIL",
+            feedback=f"Could not parse critique properly. Raw response: {raw_content[:200]}",
+            weaknesses=["Needs improvement"]
+        )
+
+async def acritique_pitches(pitches: List[str]) -> List[Critique]:
+    """Step 3 (batched): critique several candidate pitches in one call, one critique per pitch"""
+    if len(pitches) == 1:
+        return [await acritique_pitch(pitches[0])]
+    
+    numbered = "\n\n".join(f"PITCH {i + 1}:\n{pitch}" for i, pitch in enumerate(pitches))
+    messages = [_SYS_BATCH_CRITIC, HumanMessage(content=f"Critique these {len(pitches)} pitches:\n\n{numbered}")]
+    
+    async def call_critic() -> str:
+        async with llm_slot():
+            return (await llm_critic.ainvoke(messages)).content
+    
+    cache_key = LLMCache.make_key(llm_critic, messages)
+    raw_content = await llm_cache.aget_or_compute(cache_key, call_critic)
+    
+    try:
+        critiques = decode_llm_json(raw_content, CritiqueBatch).critiques
+        if len(critiques) != len(pitches):
+            raise ValueError(f"expected {len(pitches)} critiques, got {len(critiques)}")
+        return critiques
+    except Exception as e:
+        logger.error(f"Error parsing batched critique: {e}")
+        await asyncio.to_thread(llm_cache.invalidate, cache_key)
+        # Fall back to one critique per pitch, still concurrently
+        return list(await asyncio.gather(*(acritique_pitch(pitch) for pitch in pitches)))
+
+async def arefine_pitch(original_pitch: str, critique: Optional[dict], user_feedback: str = "") -> str:
+    """Step 4: Refine pitch based on critique (critique is None for a speculative refinement)"""
+    feedback = critique.get('feedback', '') if critique else ''
+    weaknesses = critique.get('weaknesses', []) if critique else []
+    
+    user_note = f"\n\nUser Feedback: {user_feedback}" if user_feedback else ""
     
     messages = [
-        SystemMessage(content=system_prompt),
+        _SYS_REFINER,
+        HumanMessage(content=f"""Original Pitch:
+{original_pitch}
+
+Critique Feedback:
+{feedback}
+
+Weaknesses to address:
+{', '.join(map(str, weaknesses))}{user_note}
+
+Create a substantially improved version.""")
+    ]
+    
+    async with llm_slot():
+        response = await llm_refiner.ainvoke(messages)
+    return response.content
+
+def pitch_similarity(previous: str, current: str) -> float:
+    """Word-level similarity of two pitches (1.0 = identical)"""
+    return difflib.SequenceMatcher(None, previous.split(), current.split(), autojunk=False).ratio()
+
+async def arefine_pitch_batch(original_pitch: str, critique: Optional[dict], user_feedback: str = "", n: int = REFINE_CANDIDATES) -> List[str]:
+    """Step 4 (batched): n distinct refinements from a single call (critique is None for a speculative refinement)"""
+    feedback = critique.get('feedback', '') if critique else ''
+    weaknesses = critique.get('weaknesses', []) if critique else []
+    
+    user_note = f"\n\nUser Feedback: {user_feedback}" if user_feedback else ""
+    
+    messages = [
+        _SYS_BATCH_REFINER,
+        HumanMessage(content=f"""Original Pitch:
+{original_pitch}
+
+Critique Feedback:
+{feedback}
+
+Weaknesses to address:
+{', '.join(map(str, weaknesses))}{user_note}
+
+Create {n} substantially improved versions.""")
+    ]
+    
+    async with llm_slot():
+        response = await llm_batch_refiner.ainvoke(messages)
+    
+    try:
+        pitches = [pitch for pitch in decode_llm_json(response.content, RefinedPitches).pitches if pitch.strip()]
+        if not pitches:
+            raise ValueError("no pitches returned")
+        return pitches[:n]
+    except Exception as e:
+        logger.error(f"Error parsing refined pitches: {e}")
+        return [await arefine_pitch(original_pitch, critique, user_feedback)]
+
+async def aprepare_final_pitch(pitch: str, user_feedback: str = "") -> dict:
+    """Step 5: Prepare final pitch package in structured JSON format"""
+    messages = [
+        _SYS_READINESS,
         HumanMessage(content=f"Approved Pitch:\n{pitch}\n\nUser Notes: {user_feedback}\n\nCreate structured final pitch package in JSON format.")
     ]
     
-    response = llm_readiness.invoke(messages)
+    async def call_readiness() -> str:
+        async with llm_slot():
+            return (await llm_readiness.ainvoke(messages)).content
+    
+    cache_key = LLMCache.make_key(llm_readiness, messages)
+    raw_content = await llm_cache.aget_or_compute(cache_key, call_readiness)
     
     try:
-        # Clean up response
-        content = response.content.strip()
-        if content.startswith("```"):
-            content = content.split("```")[1]
-            if content.startswith("json"):
-                content = content[4:]
-        content = content.strip()
-        
-        final_pitch_json = json.loads(content)
+        final_pitch_json = parse_json_object(raw_content)
         return final_pitch_json
     except Exception as e:
-        print(f"Error parsing final pitch JSON: {e}")
+        logger.error(f"Error parsing final pitch JSON: {e}")
+        await asyncio.to_thread(llm_cache.invalidate, cache_key)
         # Fallback structure
         return {
             "elevator_pitch": pitch[:200],
@@ -321,52 +658,179 @@ def prepare_final_pitch(pitch: str, user_feedback: str = "") -> dict:
 # API ENDPOINTS
 # ===========================
 
+def iso_from_ns(ns: int) -> str:
+    """Format a stored time.time_ns() timestamp for a response"""
+    return datetime.fromtimestamp(ns / 1e9).isoformat()
+
 @app.post("/api/pitch/start")
 async def start_pitch_workflow(pitch_input: PitchInput):
-    """Step 1: Start workflow and generate initial pitch"""
-    session_id = str(uuid.uuid4())
+    """Step 1: Start the workflow in the background and return the session id immediately"""
+    session_id = await _create_session(pitch_input.mvp_description)
+    await session_store.open_events(session_id)
     
-    # Gather context
-    print(f"[{session_id}] Gathering context...")
-    context = gather_context(pitch_input.mvp_description)
+    task = asyncio.create_task(_run_pipeline(session_id, pitch_input.mvp_description))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
     
-    # Generate initial pitch
-    print(f"[{session_id}] Generating pitch...")
-    pitch = generate_pitch(pitch_input.mvp_description, context)
+    return {
+        "session_id": session_id,
+        "status": SessionStatus.RUNNING,
+        "events": f"/ws/pitch/{session_id}",
+        "message": "Pitch generation started. Follow progress on the WebSocket or poll /api/pitch/status."
+    }
+
+
+async def _create_session(mvp_description: str) -> str:
+    """Store a new RUNNING session"""
+    session_id = str(uuid.uuid4())
     
-    # Store session
-    sessions[session_id] = {
-        'mvp_description': pitch_input.mvp_description,
-        'context': context,
-        'pitch': pitch,
+    await session_store.save(session_id, {
+        'mvp_description': mvp_description,
+        'pitch': None,
         'critique': {},
         'iteration_count': 0,
         'critic_fail_count': 0,
-        'status': SessionStatus.PITCH_GENERATED,
-        'created_at': datetime.now().isoformat()
-    }
-    
-    # Enter the critique-refine loop
-    return await _run_critique_refine_loop(session_id)
+        'status': SessionStatus.RUNNING,
+        'created_at_ns': time.time_ns()  # formatted only when a response needs it
+    })
+    return session_id
 
 
-async def _run_critique_refine_loop(session_id: str):
+async def _run_pipeline(session_id: str, mvp_description: str) -> Optional[dict]:
+    """Context, first pitch, then the critique-refine loop; progress is published as events.
+    Returns the loop's result, or None if the workflow failed (the session is marked FAILED)"""
+    async with workflow_lock(session_id):
+        try:
+            # Gather context
+            logger.info(f"[{session_id}] Gathering context...")
+            context = await agather_context(mvp_description)
+            await session_store.publish_event(session_id, {'event': 'context_gathered'})
+            
+            # Generate initial pitch
+            logger.info(f"[{session_id}] Generating pitch...")
+            pitch = await generate_pitch(mvp_description, context)
+            await session_store.publish_event(session_id, {'event': 'pitch_generated', 'pitch': pitch})
+            
+            # Kick off the first critique immediately, overlapping it with the session update
+            first_critique = asyncio.create_task(acritique_pitches([pitch]))
+            
+            # Context goes to the compressed blob store
+            session = await session_store.get(session_id)
+            session['pitch'] = pitch
+            session['status'] = SessionStatus.PITCH_GENERATED
+            await session_store.save(session_id, session)
+            await session_store.put_blob(session_id, {'context': context})
+            
+            # Enter the critique-refine loop
+            return await _run_critique_refine_loop(session_id, pending_critique=first_critique)
+        except Exception as e:
+            await _fail_session(session_id, e)
+            return None
+
+
+async def _fail_session(session_id: str, error: Exception):
+    """Mark the session FAILED and end its event stream"""
+    logger.exception(f"[{session_id}] Workflow failed")
+    session = await session_store.get(session_id)
+    if session is not None:
+        session['status'] = SessionStatus.FAILED
+        session['error'] = str(error)
+        await session_store.save(session_id, session)
+    await session_store.publish_event(session_id, {'event': 'failed', 'error': str(error)})
+
+
+async def _reenter_critique_refine_loop(session_id: str) -> dict:
+    """Run the loop again after a rejection or resume; a failure marks the session FAILED (502)"""
+    await session_store.reset_events(session_id)
+    try:
+        return await _run_critique_refine_loop(session_id)
+    except Exception as e:
+        await _fail_session(session_id, e)
+        raise HTTPException(status_code=502, detail=f"Pitch workflow failed: {e}")
+
+
+async def _run_critique_refine_loop(session_id: str, pending_critique: Optional[asyncio.Task] = None):
+    """Run the critic-refiner loop and end the event stream once the pitch awaits the user"""
+    result = await _critique_refine_loop(session_id, pending_critique)
+    await session_store.publish_event(session_id, {'event': 'awaiting_approval', **result})
+    return result
+
+
+async def _critique_refine_loop(session_id: str, pending_critique: Optional[asyncio.Task] = None):
     """Internal function to handle critic-refiner loop until PASS or max attempts"""
-    session = sessions[session_id]
+    session = await session_store.get(session_id)
     max_auto_refine_attempts = 3
     
+    # A checkpoint newer than the saved session means the loop was interrupted (crash, restart, failed LLM call)
+    # during a refine - pick up at that refine instead of repeating the critique. Otherwise the loop replays
+    # from the saved session.
+    interrupted = [
+        checkpoint for checkpoint in await session_store.load_checkpoints(session_id)
+        if checkpoint['iteration'] > session['iteration_count']
+    ]
+    if interrupted:
+        last = interrupted[-1]
+        logger.info(f"[{session_id}] Resuming from checkpoint (refine of iteration {last['iteration']})")
+        if pending_critique is not None:
+            pending_critique.cancel()
+            pending_critique = None
+        session['pitch'] = last['pitch']
+        session.pop('candidates', None)
+        session['critique'] = last['critique']
+        session['iteration_count'] = last['iteration']
+        session['critic_fail_count'] = last['critic_fail_count']
+        result = await _auto_refine(session_id, session, last['critique'])
+        if result is not None:
+            return result
+    
     while session['critic_fail_count'] < max_auto_refine_attempts:
-        # Critique the current pitch
-        print(f"[{session_id}] Critiquing pitch (attempt {session['critic_fail_count'] + 1})...")
-        critique = critique_pitch(session['pitch'])
+        # Critique all pending candidates in one call (the first critique may already be in flight)
+        candidates = session.get('candidates') or [session['pitch']]
+        logger.info(f"[{session_id}] Critiquing {len(candidates)} candidate(s) (attempt {session['critic_fail_count'] + 1})...")
+        critique_task = pending_critique or asyncio.create_task(acritique_pitches(candidates))
+        pending_critique = None
+        
+        # Speculatively refine while the critic runs - only when a FAIL would actually use the result.
+        # With several candidates we don't know which one to refine until the critic has ranked them.
+        refine_task = None
+        if SPECULATIVE_REFINE and len(candidates) == 1 and session['critic_fail_count'] + 1 < max_auto_refine_attempts:
+            refine_task = asyncio.create_task(arefine_pitch_batch(
+                candidates[0],
+                session['critique'] or None,  # the latest critique available; the pending one isn't known yet
+                f"Auto-refinement attempt {session['critic_fail_count'] + 1}"
+            ))
+        
+        try:
+            critiques = await critique_task
+        except BaseException:
+            if refine_task is not None:
+                refine_task.cancel()
+            raise
+        
+        # Keep the best passing candidate, otherwise the best scored one
+        passing = [i for i, candidate in enumerate(critiques) if candidate.decision == 'PASS']
+        best = max(passing or range(len(critiques)), key=lambda i: critiques[i].overall_score)
+        verdict = critiques[best]
+        critique = msgspec.to_builtins(verdict)  # plain dict for the session store and responses
+        await session_store.publish_event(session_id, {
+            'event': 'critique_done',
+            'iteration': session['iteration_count'] + 1,
+            'decision': verdict.decision,
+            'overall_score': verdict.overall_score
+        })
         
+        session['pitch'] = candidates[best]
+        session.pop('candidates', None)
         session['critique'] = critique
         session['iteration_count'] += 1
         
         # Check if critic passed
-        if critique.get('decision') == 'PASS':
+        if verdict.decision == 'PASS':
+            if refine_task is not None:
+                refine_task.cancel()
             session['status'] = SessionStatus.AWAITING_APPROVAL
-            print(f"[{session_id}] Critic PASSED! Sending to human for approval.")
+            await session_store.save(session_id, session)
+            logger.info(f"[{session_id}] Critic PASSED! Sending to human for approval.")
             
             return {
                 "session_id": session_id,
@@ -380,12 +844,13 @@ async def _run_critique_refine_loop(session_id: str):
         
         # Critic failed
         session['critic_fail_count'] += 1
-        print(f"[{session_id}] Critic FAILED (attempt {session['critic_fail_count']}/{max_auto_refine_attempts})")
+        logger.info(f"[{session_id}] Critic FAILED (attempt {session['critic_fail_count']}/{max_auto_refine_attempts})")
         
         # If we've hit max auto-refine attempts, send to human
         if session['critic_fail_count'] >= max_auto_refine_attempts:
             session['status'] = SessionStatus.AWAITING_APPROVAL
-            print(f"[{session_id}] Max auto-refine attempts reached. Sending to human for decision.")
+            await session_store.save(session_id, session)
+            logger.info(f"[{session_id}] Max auto-refine attempts reached. Sending to human for decision.")
             
             return {
                 "session_id": session_id,
@@ -398,18 +863,22 @@ async def _run_critique_refine_loop(session_id: str):
                 "message": f"Pitch failed critic review {session['critic_fail_count']} times. Auto-refinement complete. Please review and decide whether to approve or manually refine."
             }
         
-        # Auto-refine and loop back
-        print(f"[{session_id}] Auto-refining pitch...")
-        session['status'] = SessionStatus.REFINING
-        refined_pitch = refine_pitch(
-            session['pitch'],
-            critique,
-            f"Auto-refinement attempt {session['critic_fail_count']}"
-        )
-        session['pitch'] = refined_pitch
+        # Checkpoint before the refine so an interruption resumes here without re-running the critique
+        await session_store.save_checkpoint(session_id, {
+            'iteration': session['iteration_count'],
+            'pitch': session['pitch'],
+            'critique': critique,
+            'critic_fail_count': session['critic_fail_count']
+        })
+        
+        # Auto-refine into several candidates (one call) and loop back
+        result = await _auto_refine(session_id, session, critique, refine_task)
+        if result is not None:
+            return result
         
     # This should never be reached due to the check above, but just in case
     session['status'] = SessionStatus.AWAITING_APPROVAL
+    await session_store.save(session_id, session)
     return {
         "session_id": session_id,
         "status": session['status'],
@@ -420,123 +889,268 @@ async def _run_critique_refine_loop(session_id: str):
         "message": "Max refinement attempts reached. Please review."
     }
 
-@app.post("/api/pitch/approve/{session_id}")
-async def approve_pitch(session_id: str, decision: ApprovalDecision):
-    """
-    Step 2: User approves or rejects the pitch
-    - If approved=True: Generate final pitch package
-    - If approved=False: Manually refine with user feedback, then re-enter critic loop
-    """
-    if session_id not in sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    session = sessions[session_id]
-    
-    # Check if status is awaiting approval
-    if session['status'] != SessionStatus.AWAITING_APPROVAL:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Cannot approve/reject. Current status: {session['status']}"
+async def _auto_refine(session_id: str, session: dict, critique: dict, refine_task: Optional[asyncio.Task] = None) -> Optional[dict]:
+    """Refine a FAILed pitch into the next candidates and save them; returns the approval result
+    instead if refinement has stagnated"""
+    logger.info(f"[{session_id}] Auto-refining pitch...")
+    session['status'] = SessionStatus.REFINING
+    if refine_task is not None:
+        refined_pitches = await refine_task
+    else:
+        refined_pitches = await arefine_pitch_batch(
+            session['pitch'],
+            critique,
+            f"Auto-refinement attempt {session['critic_fail_count']}"
         )
     
-    # Check max total iterations (including manual refinements)
-    if session['iteration_count'] >= 10 and not decision.approved:
+    # Stop early when refinement has stagnated - another critique round would just FAIL again
+    if all(pitch_similarity(session['pitch'], refined) > STAGNATION_SIMILARITY for refined in refined_pitches):
+        session['status'] = SessionStatus.AWAITING_APPROVAL
+        await session_store.save(session_id, session)
+        logger.info(f"[{session_id}] Refinement stagnated. Sending to human for decision.")
+        
         return {
             "session_id": session_id,
-            "status": SessionStatus.MAX_ITERATIONS_REACHED,
-            "message": "Maximum 10 total iterations reached. Please approve current pitch or start a new session.",
+            "status": session['status'],
             "pitch": session['pitch'],
-            "critique": session['critique']
+            "critique": critique,
+            "iteration_count": session['iteration_count'],
+            "critic_decision": "FAIL_STAGNATED",
+            "critic_fail_count": session['critic_fail_count'],
+            "message": "Refinement is no longer changing the pitch meaningfully. Please review and approve, or reject with specific feedback."
         }
     
-    # User APPROVED - prepare final pitch
-    if decision.approved:
-        print(f"[{session_id}] User approved! Preparing final pitch...")
-        session['status'] = SessionStatus.APPROVED
+    session['pitch'] = refined_pitches[0]
+    session['candidates'] = refined_pitches
+    await session_store.publish_event(session_id, {
+        'event': 'refined',
+        'iteration': session['iteration_count'],
+        'candidates': len(refined_pitches)
+    })
+    await session_store.save(session_id, session)
+    return None
+
+@app.post("/api/pitch/approve/{session_id}")
+async def approve_pitch(session_id: str, decision: ApprovalDecision):
+    """
+    Step 2: User approves or rejects the pitch
+    - If approved=True: Generate final pitch package
+    - If approved=False: Manually refine with user feedback, then re-enter critic loop
+    """
+    return await _apply_decision(session_id, decision)
+
+async def _apply_decision(session_id: str, decision: ApprovalDecision) -> dict:
+    """Approve (final package) or reject (refine and re-run the critic loop) a session awaiting approval.
+    Holds the session's workflow lock, so a second submit of the same decision gets a 409"""
+    async with workflow_lock(session_id):
+        session = await session_store.get(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
         
-        final_pitch = prepare_final_pitch(session['pitch'], decision.feedback)
+        # Check if status is awaiting approval
+        if session['status'] != SessionStatus.AWAITING_APPROVAL:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Cannot approve/reject. Current status: {session['status']}"
+            )
         
-        session['final_pitch'] = final_pitch
-        session['status'] = SessionStatus.COMPLETED
+        # Check max total iterations (including manual refinements)
+        if session['iteration_count'] >= 10 and not decision.approved:
+            return {
+                "session_id": session_id,
+                "status": SessionStatus.MAX_ITERATIONS_REACHED,
+                "message": "Maximum 10 total iterations reached. Please approve current pitch or start a new session.",
+                "pitch": session['pitch'],
+                "critique": session['critique']
+            }
         
-        return {
-            "session_id": session_id,
-            "status": SessionStatus.COMPLETED,
-            "final_pitch_package": final_pitch,
-            "total_iterations": session['iteration_count'],
-            "message": "Pitch approved! Final package ready."
-        }
-    
-    # User REJECTED - manually refine with their feedback, then re-enter critic loop
-    else:
-        print(f"[{session_id}] User rejected. Manual refinement with feedback...")
-        session['status'] = SessionStatus.REFINING
+        # Save the transitional status before the LLM call so the decision is visible to every worker
+        session['status'] = SessionStatus.APPROVED if decision.approved else SessionStatus.REFINING
+        await session_store.save(session_id, session)
         
-        # Refine pitch with user's specific feedback
-        refined_pitch = refine_pitch(
-            session['pitch'],
-            session['critique'],
-            decision.feedback
-        )
+        try:
+            # User APPROVED - prepare final pitch
+            if decision.approved:
+                logger.info(f"[{session_id}] User approved! Preparing final pitch...")
+                final_pitch = await aprepare_final_pitch(session['pitch'], decision.feedback)
+            
+            # User REJECTED - manually refine with their feedback
+            else:
+                logger.info(f"[{session_id}] User rejected. Manual refinement with feedback...")
+                refined_pitch = await arefine_pitch(
+                    session['pitch'],
+                    session['critique'],
+                    decision.feedback
+                )
+        except Exception:
+            # Nothing was applied - let the user submit the decision again
+            session['status'] = SessionStatus.AWAITING_APPROVAL
+            await session_store.save(session_id, session)
+            raise
+        
+        if decision.approved:
+            session['final_pitch'] = final_pitch
+            session['status'] = SessionStatus.COMPLETED
+            await session_store.save(session_id, session)
+            await session_store.clear_checkpoints(session_id)
+            
+            return {
+                "session_id": session_id,
+                "status": SessionStatus.COMPLETED,
+                "final_pitch_package": final_pitch,
+                "total_iterations": session['iteration_count'],
+                "message": "Pitch approved! Final package ready."
+            }
         
         # Update session
         session['pitch'] = refined_pitch
         session['critic_fail_count'] = 0  # Reset auto-refine counter for new manual iteration
+        await session_store.save(session_id, session)
         
         # Re-enter the critic-refiner loop
-        return await _run_critique_refine_loop(session_id)
+        return await _reenter_critique_refine_loop(session_id)
+
+@app.post("/api/pitch/interactive")
+async def interactive_pitch(request: InteractiveRequest):
+    """
+    One round trip per human decision point:
+    - {mvp_description}: run context, generation and the critic loop, return once approval is needed
+    - {pending_session_id, decision}: apply the decision and return the next decision point (or the final package)
+    """
+    if request.pending_session_id:
+        if request.decision is None:
+            raise HTTPException(status_code=400, detail="decision is required with pending_session_id")
+        return await _apply_decision(request.pending_session_id, request.decision)
+    
+    if not request.mvp_description:
+        raise HTTPException(status_code=400, detail="mvp_description is required to start a session")
+    
+    session_id = await _create_session(request.mvp_description)
+    result = await _run_pipeline(session_id, request.mvp_description)
+    if result is None:
+        session = await session_store.get(session_id)
+        error = session.get('error') if session else "session expired"
+        raise HTTPException(status_code=502, detail=f"Pitch workflow failed: {error}")
+    return result
+
+@app.post("/api/pitch/resume/{session_id}")
+async def resume_pitch_workflow(session_id: str):
+    """Resume an interrupted critique-refine loop: at the interrupted refine if it was checkpointed,
+    otherwise replaying from the last saved iteration (409 while the loop is still running)"""
+    async with workflow_lock(session_id):
+        session = await session_store.get(session_id)
+        if session is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        
+        # A FAILED session can pick up again once it has a pitch (e.g. an LLM call failed mid-loop)
+        resumable = session['status'] in (SessionStatus.PITCH_GENERATED, SessionStatus.REFINING) or (
+            session['status'] == SessionStatus.FAILED and session.get('pitch')
+        )
+        if not resumable:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Nothing to resume. Current status: {session['status']}"
+            )
+        session.pop('error', None)
+        await session_store.save(session_id, session)
+        
+        return await _reenter_critique_refine_loop(session_id)
 
 @app.get("/api/pitch/status/{session_id}")
-async def get_status(session_id: str):
-    """Get current session status"""
-    if session_id not in sessions:
+async def get_status(
+    session_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated keys to return, e.g. status,iteration_count"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """Get current session status (304 if the session hasn't changed since the client's ETag)"""
+    session = await session_store.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session = sessions[session_id]
-    
-    return {
+    status = {
         "session_id": session_id,
         "status": session['status'],
+        "version": session.get('version', 0),
         "iteration_count": session['iteration_count'],
         "critic_fail_count": session.get('critic_fail_count', 0),
         "current_pitch": session.get('pitch'),
         "critique": session.get('critique'),
         "final_pitch": session.get('final_pitch'),
-        "created_at": session['created_at']
+        "error": session.get('error'),
+        "created_at": iso_from_ns(session['created_at_ns'])
     }
+    if fields:
+        wanted = {field.strip() for field in fields.split(",")}
+        status = {key: value for key, value in status.items() if key in wanted}
+    
+    # The ETag is derived from the exact body returned, so it can never vouch for content it wasn't computed from
+    body = orjson.dumps(status)
+    etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    
+    # Returning the bytes directly skips FastAPI's jsonable_encoder pass over the session
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+@app.websocket("/ws/pitch/{session_id}")
+async def pitch_events(websocket: WebSocket, session_id: str):
+    """Stream a session's progress events until it needs the user (or fails)"""
+    events = await session_store.subscribe_events(session_id)
+    if events is None:
+        await websocket.close(code=1008)
+        return
+    
+    await websocket.accept()
+    try:
+        async for event in events:
+            await websocket.send_text(orjson.dumps(event).decode())
+            if event['event'] in TERMINAL_EVENTS:
+                break
+    except WebSocketDisconnect:
+        return
+    finally:
+        await events.aclose()
+    await websocket.close()
 
 @app.get("/api/pitch/final/{session_id}")
 async def get_final_pitch(session_id: str):
     """Get final pitch package in structured JSON format (only available after approval)"""
-    if session_id not in sessions:
+    session = await session_store.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session = sessions[session_id]
-    
     if session['status'] != SessionStatus.COMPLETED:
         raise HTTPException(
             status_code=400, 
             detail=f"Final pitch not ready. Current status: {session['status']}"
         )
     
-    return {
-        "session_id": session_id,
-        "final_pitch_package": session['final_pitch'],
-        "total_iterations": session['iteration_count'],
-        "metadata": {
-            "mvp_description": session['mvp_description'],
-            "created_at": session['created_at'],
-            "final_critique_score": session.get('critique', {}).get('overall_score', 0)
-        }
-    }
+    # A completed session never changes, so serialize the package once and reuse the bytes. The session
+    # document is still loaded per request, so this saves the serialization on both backends (per worker
+    # on Redis) - session dicts can't carry the bytes, as neither store keeps mutations made after a get
+    cache_key = (session_id, session.get('version', 0))
+    body = final_json_cache.get(cache_key)
+    if body is None:
+        body = final_json_cache[cache_key] = orjson.dumps({
+            "session_id": session_id,
+            "final_pitch_package": session['final_pitch'],
+            "total_iterations": session['iteration_count'],
+            "metadata": {
+                "mvp_description": session['mvp_description'],
+                "created_at": iso_from_ns(session['created_at_ns']),
+                "final_critique_score": session.get('critique', {}).get('overall_score', 0)
+            }
+        })
+    
+    return Response(content=body, media_type="application/json")
 
 @app.delete("/api/pitch/session/{session_id}")
 async def delete_session(session_id: str):
     """Delete a session"""
-    if session_id not in sessions:
+    await session_store.clear_checkpoints(session_id)
+    if not await session_store.delete(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     
-    del sessions[session_id]
     return {"message": "Session deleted successfully"}
 
 @app.get("/")
@@ -545,20 +1159,23 @@ async def root():
     return {
         "message": "Pitch Generation Agent API v2.0",
         "workflow": {
-            "step_1": "POST /api/pitch/start - Submit MVP description, get pitch + critique",
+            "step_1": "POST /api/pitch/start - Submit MVP description, get a session id (pitch + critique arrive on the WebSocket or /status)",
             "step_2": "POST /api/pitch/approve/{session_id} - Approve (get final) or Reject (refine)",
             "step_3": "GET /api/pitch/final/{session_id} - Get final pitch package"
         },
         "endpoints": {
             "start": "POST /api/pitch/start",
             "approve_reject": "POST /api/pitch/approve/{session_id}",
+            "interactive": "POST /api/pitch/interactive",
             "status": "GET /api/pitch/status/{session_id}",
+            "events": "WS /ws/pitch/{session_id}",
             "final": "GET /api/pitch/final/{session_id}",
+            "resume": "POST /api/pitch/resume/{session_id}",
             "delete": "DELETE /api/pitch/session/{session_id}"
         },
         "example_flow": {
             "1": "POST /api/pitch/start with {'mvp_description': '...'}",
-            "2": "Review pitch and critique from response",
+            "2": "Follow WS /ws/pitch/{session_id} (or poll status) until 'awaiting_approval', then review pitch and critique",
             "3a": "POST /api/pitch/approve/{session_id} with {'approved': true} to get final",
             "3b": "POST /api/pitch/approve/{session_id} with {'approved': false, 'feedback': '...'} to refine",
             "4": "Repeat step 2-3 up to 5 times",
@@ -567,20 +1184,23 @@ async def root():
     }
 
 @app.get("/api/sessions")
-async def list_sessions():
-    """List all active sessions"""
-    return {
-        "total_sessions": len(sessions),
+async def list_sessions(limit: int = Query(100, ge=1, le=1000), cursor: Optional[str] = None):
+    """List active sessions one page at a time (pass next_cursor back as cursor)"""
+    page, next_cursor = await session_store.list_index(limit, cursor)
+    
+    return ORJSONResponse({
+        "total_sessions": await session_store.count(),
         "sessions": [
             {
                 "session_id": sid,
-                "status": session['status'],
-                "iteration_count": session['iteration_count'],
-                "created_at": session['created_at']
+                "status": summary['status'],
+                "iteration_count": summary['iteration_count'],
+                "created_at": iso_from_ns(summary['created_at_ns'])
             }
-            for sid, session in sessions.items()
-        ]
-    }
+            for sid, summary in page
+        ],
+        "next_cursor": next_cursor
+    })
 
 # ===========================
 # RUN SERVER
@@ -594,9 +1214,17 @@ if __name__ == "__main__":
     print("\nStarting server on http://localhost:8000")
     print("API Docs: http://localhost:8000/docs")
     print("\nWorkflow:")
-    print("1. POST /api/pitch/start - Generate pitch + get critique")
+    print("1. POST /api/pitch/start - Start generation (progress on WS /ws/pitch/{session_id})")
     print("2. POST /api/pitch/approve/{session_id} - Approve or Reject")
     print("3. GET /api/pitch/final/{session_id} - Get final pitch\n")
     print("="*60 + "\n")
     
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # Workers are separate processes - only the Redis session store is shared between them
+    shared_sessions = os.getenv("SESSION_BACKEND", "memory").lower() == "redis"
+    workers = int(os.getenv("WEB_CONCURRENCY", "4" if shared_sessions else "1"))
+    if workers > 1 and not shared_sessions:
+        print("WEB_CONCURRENCY > 1 needs SESSION_BACKEND=redis - starting a single worker\n")
+        workers = 1
+    
+    # "auto" picks uvloop and httptools when installed (uvicorn[standard]) and falls back on Windows
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, loop="auto", http="auto", workers=workers)
\ No newline at end of file
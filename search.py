@@ -0,0 +1,148 @@
+"""
+Market Research Search
+Pluggable search backends with a persistent, TTL'd result cache shared by the CLI and API workflows
+
+Backend is chosen with the SEARCH_BACKEND env var:
+- duckduckgo (default): DuckDuckGo text search, no API key needed
+- tavily: Tavily JSON search API (requires TAVILY_API_KEY and the tavily-python package)
+- local: SQLite FTS5 index of market-research snippets at MARKET_DB_PATH (no network)
+"""
+
+from contextlib import closing
+from functools import lru_cache
+from duckduckgo_search import DDGS
+from diskcache import Cache
+import hashlib
+import os
+import re
+import sqlite3
+
+# Results are reused for a day - market context doesn't change minute to minute
+SEARCH_CACHE_TTL = 24 * 60 * 60
+
+_search_cache = Cache(".search_cache", size_limit=100 * 1024 * 1024)
+
+
+# ===========================
+# DUCKDUCKGO
+# ===========================
+
+@lru_cache(maxsize=1)
+def _ddgs() -> DDGS:
+    """One DuckDuckGo client per process so its pooled HTTP/2 connection is reused across searches.
+    It only wraps a thread-safe httpx.Client, so searches from worker threads share it without a lock"""
+    return DDGS(timeout=10)
+
+
+def duckduckgo_search(query: str, max_results: int = 5) -> str:
+    """Run a DuckDuckGo text search and join the result snippets (same output as DuckDuckGoSearchRun)"""
+    snippets = [
+        result["body"]
+        for result in _ddgs().text(query, region="wt-wt", safesearch="moderate", timelimit="y", max_results=max_results)
+    ]
+    if not snippets:
+        return "No good DuckDuckGo Search Result was found"
+    return " ".join(snippets)
+
+
+# ===========================
+# TAVILY
+# ===========================
+
+@lru_cache(maxsize=1)
+def _tavily_client():
+    from tavily import TavilyClient  # optional dependency, only needed for this backend
+
+    api_key = os.getenv("TAVILY_API_KEY")
+    if not api_key:
+        raise ValueError("TAVILY_API_KEY not found in environment variables. Please add it to your .env file")
+    return TavilyClient(api_key=api_key)
+
+
+def tavily_search(query: str, max_results: int = 5) -> str:
+    """Single structured request to the Tavily search API"""
+    results = _tavily_client().search(query, max_results=max_results)["results"]
+    if not results:
+        return "No good Tavily Search Result was found"
+    return " ".join(result["content"] for result in results)
+
+
+# ===========================
+# LOCAL FTS5 INDEX
+# ===========================
+
+_FTS_TERM_RE = re.compile(r"\w+")
+
+
+def _market_db_path() -> str:
+    return os.getenv("MARKET_DB_PATH", "market.db")
+
+
+def init_market_db(path: str = None):
+    """Create the full-text index of market-research snippets if it doesn't exist"""
+    with closing(sqlite3.connect(path or _market_db_path())) as conn:
+        conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(title, body, url)")
+        conn.commit()
+
+
+def add_market_documents(documents: list, path: str = None):
+    """Index (title, body, url) rows for the local backend"""
+    init_market_db(path)
+    with closing(sqlite3.connect(path or _market_db_path())) as conn:
+        conn.executemany("INSERT INTO docs (title, body, url) VALUES (?, ?, ?)", documents)
+        conn.commit()
+
+
+def local_search(query: str, max_results: int = 5) -> str:
+    """Rank indexed snippets against the query terms with FTS5 (sub-millisecond, no network)"""
+    # Quote each term so user text can't be parsed as FTS5 query syntax
+    terms = _FTS_TERM_RE.findall(query)
+    if not terms:
+        return "No matching market research found in local index"
+    match = " OR ".join(f'"{term}"' for term in terms)
+
+    with closing(sqlite3.connect(_market_db_path())) as conn:
+        rows = conn.execute(
+            "SELECT body FROM docs WHERE docs MATCH ? ORDER BY rank LIMIT ?",
+            (match, max_results)
+        ).fetchall()
+    if not rows:
+        return "No matching market research found in local index"
+    return " ".join(row[0] for row in rows)
+
+
+# ===========================
+# CACHED ENTRY POINT
+# ===========================
+
+SEARCH_BACKENDS = {
+    "duckduckgo": duckduckgo_search,
+    "tavily": tavily_search,
+    "local": local_search,
+}
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so trivial variants share a cache entry"""
+    return " ".join(query.lower().split())
+
+
+def cached_search(query: str) -> str:
+    """Search with the configured backend, serving repeated queries from the disk cache (raises if the search fails)"""
+    backend = os.getenv("SEARCH_BACKEND", "duckduckgo").lower()
+    if backend not in SEARCH_BACKENDS:
+        raise ValueError(f"Unknown SEARCH_BACKEND '{backend}'. Choose one of: {', '.join(SEARCH_BACKENDS)}")
+
+    normalized = normalize_query(query)
+
+    # Local lookups are already cheaper than a cache read
+    if backend == "local":
+        return local_search(normalized)
+
+    key = hashlib.md5(f"{backend}:{normalized}".encode("utf-8")).hexdigest()
+    results = _search_cache.get(key)
+    if results is None:
+        results = SEARCH_BACKENDS[backend](normalized)
+        # Only successful searches are cached; failures fall through to the caller's fallback
+        _search_cache.set(key, results, expire=SEARCH_CACHE_TTL)
+    return results
@@ -0,0 +1,216 @@
+"""
+Semantic LLM Response Cache
+Serves repeated or paraphrased prompts from a local cache instead of calling Groq again
+"""
+
+from functools import lru_cache
+from langchain_core.messages import AIMessage
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+# Embedding tier is optional - without these packages only exact prompt matches are cached
+try:
+    import faiss
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    faiss = None
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+SIMILARITY_THRESHOLD = 0.92
+CACHE_DIR = ".semantic_cache"
+
+# Oldest entries are dropped beyond this, so each role's cache file stays small enough to rewrite on a miss
+MAX_CACHE_ENTRIES = 2000
+
+
+# ===========================
+# EMBEDDINGS
+# ===========================
+
+@lru_cache(maxsize=1)
+def load_embedder():
+    """Load the local sentence embedding model once (None if not installed)"""
+    if faiss is None:
+        return None
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+
+def embed_texts(texts: list):
+    """Embed texts in one batch as unit-length float32 vectors (cosine == inner product)"""
+    embedder = load_embedder()
+    vectors = embedder.encode(texts, batch_size=32, normalize_embeddings=True)
+    return np.asarray(vectors, dtype="float32")
+
+
+def _prompt_text(messages: list) -> str:
+    """Concatenate message contents into the text that gets embedded"""
+    return "\n\n".join(message.content for message in messages)
+
+
+def _exact_key(messages: list) -> str:
+    """Hash the exact prompt, including message roles"""
+    payload = json.dumps([(message.type, message.content) for message in messages], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ===========================
+# CACHED LLM ADAPTER
+# ===========================
+
+class CachedChatGroq:
+    """Wraps a ChatGroq role with an exact-match tier and a FAISS similarity tier persisted to disk"""
+
+    def __init__(self, llm, role: str, exact_only: bool = False, bypass_cache: bool = False,
+                 threshold: float = SIMILARITY_THRESHOLD, cache_dir: str = CACHE_DIR):
+        self.llm = llm
+        self.role = role
+        self.exact_only = exact_only
+        self.bypass_cache = bypass_cache
+        self.threshold = threshold
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._exact = {}
+        self._responses = []
+        self._index = None
+
+    def __getattr__(self, name):
+        # Expose the wrapped model's settings (model_name, temperature, ...)
+        return getattr(self.llm, name)
+
+    @property
+    def _index_path(self) -> str:
+        return os.path.join(self.cache_dir, f"{self.role}.faiss")
+
+    @property
+    def _sidecar_path(self) -> str:
+        # Exact matches and the responses for the index ids - plain JSON, so loading never executes code
+        return os.path.join(self.cache_dir, f"{self.role}.json")
+
+    def _ensure_loaded(self):
+        """Load this role's cache from disk on first use"""
+        if self._loaded:
+            return
+        sidecar = {}
+        if os.path.exists(self._sidecar_path):
+            with open(self._sidecar_path, "r", encoding="utf-8") as f:
+                sidecar = json.load(f)
+        self._exact = sidecar.get("exact", {})
+        self._responses = sidecar.get("responses", [])
+        if not self.exact_only and load_embedder() is not None:
+            if os.path.exists(self._index_path):
+                self._index = faiss.read_index(self._index_path)
+            # A crash between the two replaces in _persist can leave them out of step - start the tier over
+            if self._index is None or self._index.ntotal != len(self._responses):
+                self._index = faiss.IndexFlatIP(load_embedder().get_sentence_embedding_dimension())
+                self._responses = []
+        self._loaded = True
+
+    def _replace_atomically(self, path: str, write):
+        """Write to a temp file in the cache dir, then swap it in so readers never see a partial file"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        os.close(fd)
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _persist(self):
+        """Index via faiss.write_index plus a JSON sidecar, each replaced atomically"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if self._index is not None:
+            self._replace_atomically(self._index_path, lambda path: faiss.write_index(self._index, path))
+
+        def write_sidecar(path: str):
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"exact": self._exact, "responses": self._responses}, f)
+        self._replace_atomically(self._sidecar_path, write_sidecar)
+
+    def _lookup(self, messages: list, variant: str = ""):
+        """Return (key, vector, cached_content); cached_content is None on a miss"""
+        key = _exact_key(messages) + variant
+        with self._lock:
+            self._ensure_loaded()
+            if key in self._exact:
+                return key, None, self._exact[key]
+            if self._index is None:
+                return key, None, None
+
+        vector = embed_texts([_prompt_text(messages)])
+        with self._lock:
+            if self._index.ntotal:
+                similarities, ids = self._index.search(vector, 1)
+                if similarities[0][0] >= self.threshold:
+                    return key, vector, self._responses[ids[0][0]]
+        return key, vector, None
+
+    def _store(self, key: str, vector, content: str):
+        with self._lock:
+            self._exact[key] = content
+            if len(self._exact) > MAX_CACHE_ENTRIES:
+                del self._exact[next(iter(self._exact))]
+            if vector is not None:
+                self._index.add(vector)
+                self._responses.append(content)
+                overflow = self._index.ntotal - MAX_CACHE_ENTRIES
+                if overflow > 0:
+                    # Flat index ids are positions, so dropping the oldest vectors keeps them aligned with _responses
+                    self._index.remove_ids(np.arange(overflow, dtype="int64"))
+                    del self._responses[:overflow]
+            self._persist()
+
+    def invalidate(self, messages: list, variant: str = ""):
+        """Drop a prompt's exact-match entry, e.g. when the cached response turned out to be unusable"""
+        key = _exact_key(messages) + variant
+        with self._lock:
+            self._ensure_loaded()
+            if self._exact.pop(key, None) is not None:
+                self._persist()
+
+    def invoke(self, messages: list, **kwargs):
+        if self.bypass_cache:
+            return self.llm.invoke(messages, **kwargs)
+
+        key, vector, cached = self._lookup(messages)
+        if cached is not None:
+            return AIMessage(content=cached)
+
+        response = self.llm.invoke(messages, **kwargs)
+        self._store(key, vector, response.content)
+        return response
+
+    async def ainvoke(self, messages: list, **kwargs):
+        if self.bypass_cache:
+            return await self.llm.ainvoke(messages, **kwargs)
+
+        # Embedding and disk I/O are blocking, keep them off the event loop
+        key, vector, cached = await asyncio.to_thread(self._lookup, messages)
+        if cached is not None:
+            return AIMessage(content=cached)
+
+        response = await self.llm.ainvoke(messages, **kwargs)
+        await asyncio.to_thread(self._store, key, vector, response.content)
+        return response
+
+    async def ainvoke_n(self, messages: list, n: int, **kwargs) -> list:
+        """n independent completions of one prompt, cached together as a single entry
+        (caching each one separately would make every draft of a repeated prompt the same text)"""
+        if self.bypass_cache:
+            responses = await asyncio.gather(*[self.llm.ainvoke(messages, **kwargs) for _ in range(n)])
+            return [response.content for response in responses]
+
+        key, vector, cached = await asyncio.to_thread(self._lookup, messages, f":n={n}")
+        if cached is not None:
+            return json.loads(cached)
+
+        responses = await asyncio.gather(*[self.llm.ainvoke(messages, **kwargs) for _ in range(n)])
+        contents = [response.content for response in responses]
+        await asyncio.to_thread(self._store, key, vector, json.dumps(contents))
+        return contents
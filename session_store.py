@@ -0,0 +1,469 @@
+"""
+Session Storage for the Pitch Generation API
+In-memory TTL LRU for local development, Redis for shared state across workers
+
+Select with SESSION_BACKEND=memory|redis (default memory); Redis is reached via REDIS_URL.
+Keys starting with "_" are process-local caches and are never persisted to Redis.
+
+Each failed critique is also checkpointed as {iteration, pitch, critique, critic_fail_count} before its refine
+starts, so a loop interrupted mid-refine resumes at the refine without repeating the critique.
+
+Progress events for the WebSocket endpoint go through the store too: asyncio queues in memory, and a capped
+Redis stream per session on Redis, so a client can follow a workflow running on any worker.
+
+A per-session workflow lock (try_lock/refresh_lock/unlock, owned by the token try_lock returns) keeps two
+requests or workers from running the same session at once.
+
+Listing sessions returns a compact {status, iteration_count, created_at_ns} summary per session, oldest first.
+Both backends keep a sorted index of "created_at_ns:session_id" keys, maintained on save and delete, and page it
+with that key as the cursor - a sorted list in memory, a lexicographic sorted set on Redis.
+
+Every save bumps session['version'], which the API uses as the ETag of the session's status.
+
+Everything serialized (blobs, and Redis session documents and checkpoints) is zstd-compressed, optionally
+with a dictionary trained on sample pitches (ZSTD_DICT_PATH, see train_zstd_dictionary).
+"""
+
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from cachetools import TTLCache
+import asyncio
+import bisect
+import copy
+import orjson
+import os
+import time
+import uuid
+import zstandard
+
+# Sessions idle for an hour are dropped so abandoned workflows don't accumulate
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "10000"))
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", "3600"))
+SESSION_SWEEP_INTERVAL_SECONDS = 60
+
+# A Redis workflow lock left behind by a crashed worker blocks the session for at most this long;
+# a running workflow refreshes its lock well before then (see refresh_lock)
+WORKFLOW_LOCK_TTL_SECONDS = int(os.getenv("WORKFLOW_LOCK_TTL_SECONDS", "60"))
+
+# Events kept per session stream on Redis - one workflow round publishes a handful
+EVENT_STREAM_MAXLEN = 100
+EVENT_READ_BLOCK_MS = 15000
+
+SESSION_INDEX_FIELDS = ("status", "iteration_count", "created_at_ns")
+
+
+def bump_version(session: Dict[str, Any]):
+    session['version'] = session.get('version', 0) + 1
+
+
+def session_summary(session: Dict[str, Any]) -> Dict[str, Any]:
+    """The few fields the session listing needs"""
+    return {field: session.get(field) for field in SESSION_INDEX_FIELDS}
+
+
+def index_key(session_id: str, created_at_ns: Optional[int]) -> str:
+    """Sort key of a session in the listing (zero-padded so string order is creation order)"""
+    return f"{created_at_ns or 0:020d}:{session_id}"
+
+
+def session_id_from_index_key(key: str) -> str:
+    return key.split(":", 1)[1]
+
+
+# ===========================
+# COMPRESSION
+# ===========================
+
+def _load_zstd_dictionary() -> Optional[zstandard.ZstdCompressionDict]:
+    # Data written with a dictionary can only be read with the same one - keep ZSTD_DICT_PATH stable
+    path = os.getenv("ZSTD_DICT_PATH")
+    if not path:
+        return None
+    with open(path, "rb") as f:
+        return zstandard.ZstdCompressionDict(f.read())
+
+
+_zstd_dictionary = _load_zstd_dictionary()
+_compressor = zstandard.ZstdCompressor(level=3, dict_data=_zstd_dictionary)
+_decompressor = zstandard.ZstdDecompressor(dict_data=_zstd_dictionary)
+
+
+def train_zstd_dictionary(samples: List[str], path: str, dict_size: int = 16 * 1024):
+    """Train a compression dictionary on sample pitches/critiques (~100+) and write it for ZSTD_DICT_PATH"""
+    dictionary = zstandard.train_dictionary(dict_size, [sample.encode("utf-8") for sample in samples])
+    with open(path, "wb") as f:
+        f.write(dictionary.as_bytes())
+
+
+def pack_blob(obj: Any) -> bytes:
+    """Serialize and compress a session document or large field"""
+    return _compressor.compress(orjson.dumps(obj))
+
+
+def unpack_blob(blob: bytes) -> Any:
+    return orjson.loads(_decompressor.decompress(blob))
+
+
+# ===========================
+# IN-MEMORY BACKEND
+# ===========================
+
+class MemorySessionStore:
+    """Bounded TTL LRU in process memory (single worker only)"""
+
+    def __init__(self, maxsize: int = MAX_SESSIONS, ttl: int = SESSION_TTL_SECONDS):
+        # One record per session holding the live session dict plus its side data
+        # (compressed blob, checkpoints), so all of it is evicted and expires together
+        self.records: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.lock = asyncio.Lock()
+        self.running: Dict[str, str] = {}  # session id -> lock token of the workflow in flight
+        self.events: Dict[str, asyncio.Queue] = {}  # only sessions that opened an event stream
+        # Sorted listing index; expired or evicted sessions are dropped from it by the sweeper
+        self.index: List[str] = []
+        self.index_keys: Dict[str, str] = {}  # session id -> its key in self.index
+        self._sweeper: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._sweeper = asyncio.create_task(self._expire_loop())
+
+    async def close(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+
+    async def _expire_loop(self):
+        """TTLCache only expires lazily on access - sweep periodically so memory is actually released"""
+        while True:
+            await asyncio.sleep(SESSION_SWEEP_INTERVAL_SECONDS)
+            async with self.lock:
+                self.records.expire()
+                for session_id in [session_id for session_id in self.events if session_id not in self.records]:
+                    del self.events[session_id]
+                for session_id in [session_id for session_id in self.index_keys if session_id not in self.records]:
+                    self._unindex(session_id)
+
+    def _unindex(self, session_id: str):
+        key = self.index_keys.pop(session_id, None)
+        if key is not None:
+            position = bisect.bisect_left(self.index, key)
+            if position < len(self.index) and self.index[position] == key:
+                del self.index[position]
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        # Callers get a copy, as from Redis: mutations only become visible (and versioned) on save()
+        async with self.lock:
+            record = self.records.get(session_id)
+        return copy.deepcopy(record['session']) if record is not None else None
+
+    async def save(self, session_id: str, session: Dict[str, Any]):
+        # Re-inserting refreshes the TTL, so expiry counts from the last update
+        bump_version(session)
+        stored = copy.deepcopy(session)
+        async with self.lock:
+            record = self.records.get(session_id) or {'blob': None, 'checkpoints': []}
+            record['session'] = stored
+            self.records[session_id] = record
+            if session_id not in self.index_keys:
+                key = index_key(session_id, stored.get('created_at_ns'))
+                self.index_keys[session_id] = key
+                bisect.insort(self.index, key)
+
+    async def delete(self, session_id: str) -> bool:
+        """Remove a session with its blob and checkpoints; returns False if it didn't exist"""
+        async with self.lock:
+            self.events.pop(session_id, None)
+            self._unindex(session_id)
+            return self.records.pop(session_id, None) is not None
+
+    async def count(self) -> int:
+        async with self.lock:
+            self.records.expire()
+            return len(self.records)
+
+    async def list_index(self, limit: int, cursor: Optional[str] = None) -> Tuple[List[Tuple[str, Dict[str, Any]]], Optional[str]]:
+        """One page of (session_id, summary), oldest first; the cursor is the index key of the previous page's
+        last entry (None on the last page), so saves and evictions never shift pages"""
+        async with self.lock:
+            position = bisect.bisect_right(self.index, cursor) if cursor is not None else 0
+            page = []
+            while position < len(self.index) and len(page) < limit:
+                key = self.index[position]
+                position += 1
+                # Entries of sessions that expired since the last sweep are skipped
+                record = self.records.get(session_id_from_index_key(key))
+                if record is not None:
+                    page.append((session_id_from_index_key(key), session_summary(record['session'])))
+            if position < len(self.index):
+                return page, key
+        return page, None
+
+    async def put_blob(self, session_id: str, obj: Any):
+        # Large, rarely read fields (e.g. research context) are kept compressed
+        blob = pack_blob(obj)
+        async with self.lock:
+            record = self.records.get(session_id)
+            if record is not None:
+                record['blob'] = blob
+
+    async def get_blob(self, session_id: str) -> Any:
+        async with self.lock:
+            record = self.records.get(session_id)
+        blob = record['blob'] if record is not None else None
+        return unpack_blob(blob) if blob is not None else None
+
+    async def save_checkpoint(self, session_id: str, checkpoint: Dict[str, Any]):
+        async with self.lock:
+            record = self.records.get(session_id)
+            if record is not None:
+                record['checkpoints'].append(checkpoint)
+
+    async def load_checkpoints(self, session_id: str) -> List[Dict[str, Any]]:
+        """Checkpoints for a session, oldest iteration first"""
+        async with self.lock:
+            record = self.records.get(session_id)
+            return list(record['checkpoints']) if record is not None else []
+
+    async def clear_checkpoints(self, session_id: str):
+        async with self.lock:
+            record = self.records.get(session_id)
+            if record is not None:
+                record['checkpoints'] = []
+
+    async def try_lock(self, session_id: str) -> Optional[str]:
+        """Claim the session's workflow; returns the lock token, or None if one is already running"""
+        if session_id in self.running:
+            return None
+        token = uuid.uuid4().hex
+        self.running[session_id] = token
+        return token
+
+    async def refresh_lock(self, session_id: str, token: str) -> bool:
+        # Process-local locks don't expire
+        return self.running.get(session_id) == token
+
+    async def unlock(self, session_id: str, token: str):
+        if self.running.get(session_id) == token:
+            del self.running[session_id]
+
+    async def open_events(self, session_id: str):
+        self.events[session_id] = asyncio.Queue()
+
+    async def reset_events(self, session_id: str):
+        """Drop undelivered events of an earlier round so a re-entered loop's stream starts clean"""
+        events = self.events.get(session_id)
+        while events is not None and not events.empty():
+            events.get_nowait()
+
+    async def publish_event(self, session_id: str, event: Dict[str, Any]):
+        """Push a progress event (no-op unless the session opened an event stream)"""
+        events = self.events.get(session_id)
+        if events is not None:
+            events.put_nowait(event)
+
+    async def subscribe_events(self, session_id: str) -> Optional[AsyncIterator[Dict[str, Any]]]:
+        """The session's events as they arrive, or None if it has no event stream"""
+        events = self.events.get(session_id)
+        if events is None:
+            return None
+
+        async def stream():
+            while True:
+                yield await events.get()
+        return stream()
+
+
+# ===========================
+# REDIS BACKEND
+# ===========================
+
+class RedisSessionStore:
+    """Sessions as compressed orjson documents under pitch:{id} with a sliding TTL, shared by all workers"""
+
+    INDEX_KEY = "sessions:index"  # session id -> summary
+    ORDER_KEY = "sessions:order"  # index keys, all scored 0 so ZRANGEBYLEX pages them in creation order
+    EXPIRY_KEY = "sessions:expiry"  # session id -> when its document expires
+
+    def __init__(self, url: str, ttl: int = SESSION_TTL_SECONDS):
+        import redis.asyncio as redis  # only needed for this backend
+
+        self.redis = redis.Redis.from_url(url)
+        self.ttl = ttl
+        # Only the holder's token may extend or release a lock, even after it expired and was re-taken
+        self._refresh_lock_script = self.redis.register_script(
+            "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('expire', KEYS[1], ARGV[2]) end return 0"
+        )
+        self._unlock_script = self.redis.register_script(
+            "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+        )
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"pitch:{session_id}"
+
+    @staticmethod
+    def _blob_key(session_id: str) -> str:
+        return f"pitch:{session_id}:blob"
+
+    @staticmethod
+    def _lock_key(session_id: str) -> str:
+        return f"pitch:{session_id}:lock"
+
+    @staticmethod
+    def _events_key(session_id: str) -> str:
+        return f"pitch:{session_id}:events"
+
+    @staticmethod
+    def _checkpoints_key(session_id: str) -> str:
+        # One hash per session, field = iteration, so loading or clearing never scans the keyspace
+        return f"pitch:{session_id}:checkpoints"
+
+    async def start(self):
+        await self.redis.ping()
+
+    async def close(self):
+        await self.redis.close()
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        raw = await self.redis.get(self._key(session_id))
+        return unpack_blob(raw) if raw is not None else None
+
+    async def save(self, session_id: str, session: Dict[str, Any]):
+        bump_version(session)
+        persisted = {key: value for key, value in session.items() if not key.startswith("_")}
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(self._key(session_id), pack_blob(persisted), ex=self.ttl)
+            pipe.hset(self.INDEX_KEY, session_id, orjson.dumps(session_summary(persisted)))
+            pipe.zadd(self.ORDER_KEY, {index_key(session_id, persisted.get('created_at_ns')): 0})
+            pipe.zadd(self.EXPIRY_KEY, {session_id: time.time() + self.ttl})
+            await pipe.execute()
+
+    async def delete(self, session_id: str) -> bool:
+        summary = await self.redis.hget(self.INDEX_KEY, session_id)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.delete(self._key(session_id))
+            pipe.delete(self._blob_key(session_id))
+            pipe.delete(self._events_key(session_id))
+            self._unindex(pipe, session_id, summary)
+            deleted = (await pipe.execute())[0]
+        return deleted == 1
+
+    def _unindex(self, pipe, session_id: str, summary: Optional[bytes]):
+        pipe.hdel(self.INDEX_KEY, session_id)
+        pipe.zrem(self.EXPIRY_KEY, session_id)
+        if summary is not None:
+            pipe.zrem(self.ORDER_KEY, index_key(session_id, orjson.loads(summary).get('created_at_ns')))
+
+    async def _prune_index(self):
+        """Index entries outlive sessions that expired by TTL - drop the ones past their expiry"""
+        candidates = [session_id.decode() for session_id in await self.redis.zrangebyscore(self.EXPIRY_KEY, "-inf", time.time())]
+        if not candidates:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for session_id in candidates:
+                pipe.exists(self._key(session_id))
+            pipe.hmget(self.INDEX_KEY, candidates)
+            *alive, summaries = await pipe.execute()
+        # A save that raced the lookup re-extended the document - keep those
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for session_id, exists, summary in zip(candidates, alive, summaries):
+                if not exists:
+                    self._unindex(pipe, session_id, summary)
+            await pipe.execute()
+
+    async def count(self) -> int:
+        await self._prune_index()
+        return await self.redis.zcard(self.EXPIRY_KEY)
+
+    async def list_index(self, limit: int, cursor: Optional[str] = None) -> Tuple[List[Tuple[str, Dict[str, Any]]], Optional[str]]:
+        """One page of (session_id, summary), oldest first; the cursor is the index key of the previous page's
+        last entry (None on the last page)"""
+        await self._prune_index()
+        keys = [
+            key.decode() for key in
+            await self.redis.zrangebylex(self.ORDER_KEY, f"({cursor}" if cursor else "-", "+", start=0, num=limit + 1)
+        ]
+        session_ids = [session_id_from_index_key(key) for key in keys[:limit]]
+        summaries = await self.redis.hmget(self.INDEX_KEY, session_ids) if session_ids else []
+        page = [
+            (session_id, orjson.loads(summary))
+            for session_id, summary in zip(session_ids, summaries)
+            if summary is not None
+        ]
+        return page, (keys[limit - 1] if len(keys) > limit else None)
+
+    async def put_blob(self, session_id: str, obj: Any):
+        await self.redis.set(self._blob_key(session_id), pack_blob(obj), ex=self.ttl)
+
+    async def get_blob(self, session_id: str) -> Any:
+        blob = await self.redis.get(self._blob_key(session_id))
+        return unpack_blob(blob) if blob is not None else None
+
+    async def save_checkpoint(self, session_id: str, checkpoint: Dict[str, Any]):
+        key = self._checkpoints_key(session_id)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(key, checkpoint['iteration'], pack_blob(checkpoint))
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def load_checkpoints(self, session_id: str) -> List[Dict[str, Any]]:
+        """Checkpoints for a session, oldest iteration first"""
+        values = await self.redis.hvals(self._checkpoints_key(session_id))
+        checkpoints = [unpack_blob(raw) for raw in values]
+        return sorted(checkpoints, key=lambda checkpoint: checkpoint['iteration'])
+
+    async def clear_checkpoints(self, session_id: str):
+        await self.redis.delete(self._checkpoints_key(session_id))
+
+    async def try_lock(self, session_id: str) -> Optional[str]:
+        """Claim the session's workflow across all workers (SET NX with a random token);
+        returns the token, or None if one is already running"""
+        token = uuid.uuid4().hex
+        if await self.redis.set(self._lock_key(session_id), token, nx=True, ex=WORKFLOW_LOCK_TTL_SECONDS):
+            return token
+        return None
+
+    async def refresh_lock(self, session_id: str, token: str) -> bool:
+        """Extend the lock's TTL; False if it expired and is no longer ours"""
+        return bool(await self._refresh_lock_script(keys=[self._lock_key(session_id)], args=[token, WORKFLOW_LOCK_TTL_SECONDS]))
+
+    async def unlock(self, session_id: str, token: str):
+        await self._unlock_script(keys=[self._lock_key(session_id)], args=[token])
+
+
+    async def open_events(self, session_id: str):
+        await self.redis.delete(self._events_key(session_id))
+
+    async def reset_events(self, session_id: str):
+        """Start a re-entered loop's stream clean - subscribers replay the stream from its start"""
+        await self.redis.delete(self._events_key(session_id))
+
+    async def publish_event(self, session_id: str, event: Dict[str, Any]):
+        """Append a progress event to the session's stream (capped, and expiring with the session)"""
+        key = self._events_key(session_id)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.xadd(key, {"event": orjson.dumps(event)}, maxlen=EVENT_STREAM_MAXLEN, approximate=True)
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def subscribe_events(self, session_id: str) -> Optional[AsyncIterator[Dict[str, Any]]]:
+        """The session's events from the start of its stream, or None if the session doesn't exist"""
+        if not await self.redis.exists(self._key(session_id)):
+            return None
+        key = self._events_key(session_id)
+
+        async def stream():
+            last_id = "0"
+            while True:
+                for _, entries in await self.redis.xread({key: last_id}, block=EVENT_READ_BLOCK_MS) or []:
+                    for entry_id, fields in entries:
+                        last_id = entry_id
+                        yield orjson.loads(fields[b"event"])
+        return stream()
+
+
+def create_session_store():
+    """Build the store selected by SESSION_BACKEND"""
+    backend = os.getenv("SESSION_BACKEND", "memory").lower()
+    if backend == "redis":
+        return RedisSessionStore(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    if backend == "memory":
+        return MemorySessionStore()
+    raise ValueError(f"Unknown SESSION_BACKEND '{backend}'. Choose 'memory' or 'redis'")